@@ -26,15 +26,35 @@ Each dataset has the following properties:
     dtype:
         Data type of audio samples (ef, `tf.float32`).
 
+    format:
+        Format of audio data in `TFRecord` files ("float32" or "pcm16"). Both
+        formats are parsed into `tf.float32` samples by `open_speech.parse_serial`.
+
     files:
         List of all `TFRecord` files comprising the dataset.
 
+    stats:
+        Precomputed statistics (number of examples, total audio duration,
+        length histograms, etc) of the dataset. Each split also has its own
+        statistics, eg `cv.train.stats`, and `cv.train.num_examples` returns
+        number of examples in the split without reading any labels. See
+        `open_speech.Stats` for details.
+
     train_labels, valid_labels, test_labels:
         Dictionary of training, validation and test split labels in the form
         "uuid": "label".
 
+    clean_labels:
+        Read-only mapping of all labels cleaned using `open_speech.clean`.
+        Clean labels are computed once per version of the metadata and cached
+        on disk in `$OPEN_SPEECH_CACHE` (defaults to "~/.cache/open_speech").
+
+    alphabet, max_label_length:
+        Characters used in clean labels and length of the longest clean label.
+
     labels:
-        Dictionary of all labels in the dataset.
+        Read-only mapping of all labels in the dataset in the form "uuid":
+        "label". It is a view of the split labels and is not copied on access.
 
     train_recordset, valid_recordset, test_recordset:
         Training, validation and test split recordsets. Each recordset is an
@@ -53,6 +73,56 @@ Each dataset has the following properties:
         dataset = dataset.map(open_speech.parse_serial) # serial -> (uuid, audio)
         dataset = dataset.map(lambda uuid, audio: (audio, table.lookup(uuid))) # (uuid, audio) -> (audio, label)
 
+        To translate uuids directly into integer token ids (eg, characters of
+        clean labels), use `open_speech.token_table` instead, which tokenizes
+        all labels up front:
+
+        table = open_speech.token_table(cv.clean_labels)
+        dataset = dataset.map(lambda uuid, audio: (audio, table.lookup(uuid))) # (uuid, audio) -> (audio, tokens)
+
+    get_train_recordset(), get_valid_recordset(), get_test_recordset():
+        Same as above, but accept additional parameters. For example, pass an
+        instance of `open_speech.ShardCache` to keep local copies of the
+        `TFRecord` files and read them from disk in subsequent epochs:
+
+        cache = open_speech.ShardCache("/mnt/ssd/open-speech", max_size=500 * 1024**3)
+        dataset = cv.get_train_recordset(cache=cache)
+
+        Or, pass `seed` and `epoch` to read records in reproducible order. The
+        iterator of such recordset can be saved with `tf.train.Checkpoint` and
+        restored to resume a preempted epoch without re-reading the files:
+
+        dataset = cv.get_train_recordset(seed=42, epoch=epoch)
+
+        For data-parallel training, pass `num_shards` and `shard_index` to have
+        each worker read a disjoint part of the files, balanced by size:
+
+        dataset = open_speech.get_train_recordset(num_shards=num_workers, shard_index=worker_index)
+
+    get_train_dataset(), get_valid_dataset(), get_test_dataset():
+        Return recordsets that have been batched and parsed using
+        `open_speech.parse_batch`, which is much faster than mapping
+        `open_speech.parse_serial` over individual examples. Each element is
+        a tuple of (uuid, audio, length) with audio zero-padded to the longest
+        example in the batch, or (uuid, audio) with ragged audio if
+        `ragged=True`.
+
+        Example:
+
+        dataset = cv.get_train_dataset(batch_size=32)
+        dataset = dataset.map(lambda uuid, audio, length: (audio, length, table.lookup(uuid)))
+
+Metadata of each split is read lazily on first access. To read metadata of all
+splits concurrently, call `open_speech.prefetch_metadata()` or set the
+`OPEN_SPEECH_PREFETCH=1` environment variable to start reading it in the
+background when `open_speech` is imported.
+
+TensorFlow is only imported once it is needed (eg, to create a recordset), so
+metadata-only use of `open_speech` (eg, `labels`, `files` or `clean`) starts
+quickly. Metadata stored in public Google Cloud Storage buckets is read over
+HTTPS; set `OPEN_SPEECH_HTTP=0` to read it using `tf.io.gfile` instead (eg, to
+use its credentials).
+
 The above properties can also be applied directly to the `open_speech` module,
 in which case they are passed through to `open_speech.datasets`. In other words:
 
@@ -63,9 +133,16 @@ in which case they are passed through to `open_speech.datasets`. In other words:
     dataset = dataset.map(lambda uuid, audio: (audio, table.lookup(uuid)))
 """
 
+import os as _os
+
+from .cache import ShardCache
+from .columns import ColumnFile, ColumnMapping
 from .dataset import DataSet
 from .multiset import MultiSet
-from .util import AUTOTUNE, parse_serial, lookup_table, clean
+from .stats import Stats
+from .tokens import TokenTable, token_table, encode_labels
+from .util import AUTOTUNE, parse_serial, parse_batch, parse_features, lookup_table
+from .util import clean, clean_many, clean_tensor
 
 common_voice = DataSet(path="gs://open-speech-v5/common-voice/en", name="common_voice")
 voxforge     = DataSet(path="gs://open-speech-v5/voxforge/en"    , name="voxforge"    )
@@ -73,11 +150,16 @@ librispeech  = DataSet(path="gs://open-speech-v5/librispeech/en" , name="librisp
 
 datasets = MultiSet([ common_voice, voxforge, librispeech ])
 
+# set OPEN_SPEECH_PREFETCH=1 to start reading metadata in the background as soon
+# as the module is imported
+if _os.environ.get("OPEN_SPEECH_PREFETCH", "0") not in [ "", "0" ]:
+    datasets.prefetch_metadata(wait=False)
+
 _attrs = [
-    "sample_rate", "dtype", "files",
+    "sample_rate", "dtype", "format", "files", "stats",
     "train_recordset", "valid_recordset", "test_recordset",
     "train_labels", "valid_labels", "test_labels",
-    "labels"
+    "labels", "clean_labels", "alphabet", "max_label_length",
 ]
 
 def __dir__():
@@ -91,17 +173,37 @@ def __getattr__(name):
         "module '{}' has no attribute '{}'".format(__name__, name)
     )
 
-def get_train_recordset(num_parallel_reads=AUTOTUNE):
+def prefetch_metadata(wait=True):
+    """Reads metadata of all datasets concurrently (see `MultiSet.prefetch_metadata`)."""
+
+    return datasets.prefetch_metadata(wait=wait)
+
+def get_train_recordset(num_parallel_reads=AUTOTUNE, **kwargs):
     """Returns training split recordset."""
 
-    return datasets.get_train_recordset(num_parallel_reads)
+    return datasets.get_train_recordset(num_parallel_reads, **kwargs)
 
-def get_valid_recordset(num_parallel_reads=AUTOTUNE):
+def get_valid_recordset(num_parallel_reads=AUTOTUNE, **kwargs):
     """Returns validation split recordset."""
 
-    return datasets.get_valid_recordset(num_parallel_reads)
+    return datasets.get_valid_recordset(num_parallel_reads, **kwargs)
 
-def get_test_recordset(num_parallel_reads=AUTOTUNE):
+def get_test_recordset(num_parallel_reads=AUTOTUNE, **kwargs):
     """Returns test split recordset."""
 
-    return datasets.get_test_recordset(num_parallel_reads)
+    return datasets.get_test_recordset(num_parallel_reads, **kwargs)
+
+def get_train_dataset(batch_size, **kwargs):
+    """Returns batched and parsed training split dataset."""
+
+    return datasets.get_train_dataset(batch_size, **kwargs)
+
+def get_valid_dataset(batch_size, **kwargs):
+    """Returns batched and parsed validation split dataset."""
+
+    return datasets.get_valid_dataset(batch_size, **kwargs)
+
+def get_test_dataset(batch_size, **kwargs):
+    """Returns batched and parsed test split dataset."""
+
+    return datasets.get_test_dataset(batch_size, **kwargs)
@@ -0,0 +1,1267 @@
+"""Builds `open-speech` datasets from audio files and labels.
+
+Input of the builder is a directory with a JSON lines file for each data split
+(eg, "train.jsonl"), as written by the `tools/*/en/*_prep.py` scripts. Each line
+describes one example:
+
+    {"path": "19/198/19-198-0000.wav", "audio_size": 405440, "label": "..."}
+
+where path is relative to the input directory and audio_size is the size of the
+audio data in bytes (see `read_audio_size`). Audio files are either 16-bit mono
+WAV files at the target sample rate, or compressed files (eg, MP3 or FLAC),
+which are decoded and resampled in the processes writing the shards (see
+`read_audio`). Decoding compressed files requires PyAV (`pip install av`).
+
+Output is written to a local directory or any path supported by
+`tf.io.gfile` (eg, "gs://bucket/path") and consists of the `TFRecord` files,
+metadata of each split in .pickle and .columns formats (see `DataSplit`) and a
+manifest of finished shards, which is used to resume interrupted builds. Shards
+are written by separate processes, so in-memory "ram://" paths can't be used;
+tests build into a temporary directory instead.
+
+Optionally, the builder also writes pre-computed log-mel or MFCC features of
+each example into feature shards, which mirror the audio shards (see
+`compute_features` and `DataSplit.features_recordset`).
+
+Command line usage:
+
+    python -m open_speech.build librispeech ~/librispeech/extracted/LibriSpeech ~/librispeech/data
+
+Run with --help for all options.
+"""
+
+import argparse as _argparse
+import functools as _functools
+import hashlib as _hashlib
+import heapq as _heapq
+import io as _io
+import json as _json
+import math as _math
+import multiprocessing as _multiprocessing
+import os as _os
+import pickle as _pickle
+import random as _random
+import tarfile as _tarfile
+import wave as _wave
+
+from collections import deque as _deque
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from uuid import NAMESPACE_URL as _NAMESPACE_URL, UUID as _UUID, uuid5 as _uuid5
+
+from .columns import write_metadata as _write_column_metadata
+from .stats import make_stats
+from .util import _LazyModule, _tf, read_data
+
+_av = _LazyModule("av")
+_np = _LazyModule("numpy")
+
+# known corpora in the form "name": { "license": ..., "splits": [ ... ] }, where
+# "archives" maps archive names to splits and "weights" are split weights for
+# archives containing examples of all splits (see `Builder.build_archives`)
+corpora = {
+    "common-voice": { "license": None, "splits": [ "dev", "test", "train" ] },
+    "librispeech": { "license": "CC-BY-4.0", "splits": [ "train", "valid", "test" ],
+        "archives": {
+            "train-clean-100": "train", "train-clean-360": "train",
+            "dev-clean": "valid", "test-clean": "test",
+        },
+    },
+    "voxforge": { "license": "GPL-3", "splits": [ "train", "valid", "test" ],
+        "weights": { "train": .8, "valid": .1, "test": .1 },
+    },
+}
+
+max_audio_size = 680000 # 21.25s @ 16kHz, 16-bit
+
+audio_types = [ ".wav", ".flac", ".mp3" ]
+
+# prompt files in the order of preference (VoxForge archives can contain several
+# of them), and LibriSpeech transcripts
+prompt_names = [
+    "prompts-original",
+    "prompt.txt", "prompts.txt", "cc.prompts", "therainbowpassage.prompt",
+    "Transcriptions.txt", "a13.text", "rp.text",
+    "PROMPTS",
+]
+prompt_suffix = ".trans.txt"
+
+formats = [ "pcm16", "float32" ]
+
+# feature parameters and their defaults (see `compute_features`)
+feature_types = [ "log-mel", "mfcc" ]
+feature_dtypes = [ "float16", "int8" ]
+feature_defaults = {
+    "type": "log-mel",
+    "dtype": "float16",
+    "frame_length": 400, # 25ms @ 16kHz
+    "frame_step": 160, # 10ms @ 16kHz
+    "fft_length": None, # smallest power of 2 >= frame_length
+    "num_mel_bins": 80,
+    "num_mfccs": 13,
+    "lower_edge_hertz": 20.0,
+    "upper_edge_hertz": 7600.0,
+}
+
+class Builder:
+    """Builds data splits of a dataset.
+
+    Examples are shuffled with a fixed seed and packed into shards of at most
+    `max_shard_size` bytes using exact record sizes (see `pack_shards`).
+    Shards are written in parallel processes.
+
+    Each finished shard is recorded in the manifest along with a digest of its
+    inputs, so a build can be interrupted and resumed, and shards whose inputs
+    haven't changed are not written again. Uuids are derived from the dataset
+    name and audio file paths, so they stay the same when a dataset is rebuilt
+    or extended.
+
+    Usage example:
+
+    builder = Builder("librispeech", input_path, "gs://bucket/librispeech", license="CC-BY-4.0")
+    for split in [ "train", "valid", "test" ]: builder.build(split)
+
+    Attributes:
+        name: Name of the dataset.
+        input_path: Directory containing the JSON lines files and audio files.
+        output_path: Directory to write the dataset to.
+        license: License of the dataset.
+        sample_rate: Audio sample rate.
+        format: Audio format ("pcm16" or "float32", see `parse_serial`).
+        max_shard_size: Maximum size of `TFRecord` files in bytes.
+        max_audio_size: Maximum size of audio data in bytes; longer examples
+            are discarded (or `None` to keep all examples).
+        features: Parameters of feature shards to write along with the audio
+            shards (see `feature_params`), or `None` to write audio only.
+        max_workers: Number of processes to write shards with (defaults to the
+            number of CPUs).
+        seed: Seed to shuffle examples with.
+        progress: Whether to print progress.
+    """
+
+    def __init__(self, name, input_path, output_path, license=None, sample_rate=16000,
+            format="pcm16", max_shard_size=256 * 1024 ** 2, max_audio_size=None,
+            features=None, max_workers=None, seed=0, progress=True):
+        if format not in formats: raise ValueError("Unknown audio format: {}".format(format))
+
+        self.name = name
+        self.input_path = str(input_path)
+        self.output_path = str(output_path)
+        self.license = license
+        self.sample_rate = sample_rate
+        self.format = format
+        self.max_shard_size = max_shard_size
+        self.max_audio_size = max_audio_size
+        self.features = feature_params(features, sample_rate) if features is not None else None
+        self.max_workers = max_workers or _os.cpu_count()
+        self.seed = seed
+        self.progress = progress
+
+    def build(self, split, append=False):
+        """Builds data split and writes its metadata.
+
+        Args:
+            split: Name of the split (eg, "train"). Examples are read from
+                "<split>.jsonl" in the input directory.
+            append: Whether to keep existing shards of the split and only write
+                shards for examples that are not in its metadata yet.
+
+        Returns:
+            A `dict` of split metadata.
+        """
+
+        _tf.io.gfile.makedirs(self._output("manifest"))
+
+        rows = list(read_rows(_os.path.join(self.input_path, split + ".jsonl")))
+        if self.max_audio_size is not None:
+            rows = [ row for row in rows if row["audio_size"] <= self.max_audio_size ]
+        self._print("Total examples:", len(rows))
+
+        _random.Random(self.seed).shuffle(rows)
+        for row in rows: row["uuid"] = self.make_uuid(row["path"])
+
+        templ = split + "-{:04d}-of-{:04d}.tfrec"
+        names, dones = [], []
+
+        metadata_path = self._output(split + ".pickle")
+        if append and _tf.io.gfile.exists(metadata_path):
+            self._print("Appending to:", metadata_path)
+            existing = read_data(metadata_path)
+            check_appendable(existing, metadata_path)
+            if _strip_files(existing.get("features")) != self.features: raise ValueError(
+                "Feature parameters don't match existing split: " + metadata_path
+            )
+            names, dones = existing["files"], split_shards(existing)
+
+            rows = [ row for row in rows if row["uuid"] not in existing["labels"] ]
+            self._print("New examples:", len(rows))
+
+            # new shards are named after the examples they contain, so they
+            # don't overwrite shards written earlier
+            tag = _hashlib.md5("".join(row["uuid"] for row in rows).encode("utf-8")).hexdigest()[:8]
+            templ = split + "-" + tag + "-{:04d}-of-{:04d}.tfrec"
+
+        if rows:
+            new_names, new_dones = self.write_shards(rows, templ)
+            names, dones = names + new_names, dones + new_dones
+
+        return self.finish(split, names, dones)
+
+    def build_archives(self, archives, weights=None):
+        """Builds data splits from tar archives without extracting them.
+
+        Archives (eg, ".tar.gz" or ".tgz") are read as a stream. Members are
+        grouped into units, each of which is a directory containing audio
+        files and a prompts or transcript file (eg, a LibriSpeech chapter or a
+        VoxForge session, see `read_archive`). Units are decoded in parallel
+        processes, and the examples are written into shards as they come.
+
+        Examples are spread randomly over several shards of each split that are
+        written at the same time, to mix examples from different units and
+        archives. Each shard is closed when the next example no longer fits
+        into `max_shard_size`.
+
+        NB: Unlike `Builder.build`, this can't resume an interrupted build or
+        append to existing splits.
+
+        Args:
+            archives: A `dict` in the form "path": split, where split is the
+                name of the data split for all examples in the archive, or
+                `None` to assign each example to a split using `weights`.
+            weights: A `dict` of split weights in the form "split": weight.
+                Examples are assigned to splits based on their uuid, so the
+                assignment is the same for each build.
+
+        Returns:
+            A `dict` of split metadata in the form "split": metadata.
+        """
+
+        _tf.io.gfile.makedirs(self.output_path)
+
+        rng = _random.Random(self.seed)
+        sinks, errors = {}, []
+
+        def units():
+            for path, split in archives.items():
+                self._print("Reading:", path)
+                for unit, unit_errors in read_archive(path):
+                    errors.extend(unit_errors)
+                    yield split, unit
+
+        # "spawn" is used because TensorFlow is not fork-safe
+        context = _multiprocessing.get_context("spawn")
+        with _ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+            results = _bounded_map(pool, self.decode_unit, units(), 2 * self.max_workers)
+            for examples, unit_errors in self._progress(results, None):
+                errors.extend(unit_errors)
+
+                for split, uuid, label, length, record, features in examples:
+                    if split is None: split = weighted_split(uuid, weights)
+                    if split not in sinks: sinks[split] = _ShardSink(self, split, rng)
+                    sinks[split].write(uuid, label, length, record, features)
+
+        if errors:
+            self._print("\nErrors:")
+            for error in errors: self._print(error)
+
+        metadata = {}
+        for split, sink in sinks.items():
+            self._print("\nSplit:", split)
+            self._print("Total examples:", sink.count)
+            metadata[split] = self.finish(split, *sink.close())
+
+        return metadata
+
+    def decode_unit(self, split, unit):
+        """Decodes and encodes examples of a unit read from an archive (see `read_archive`).
+
+        Runs in worker processes, so records (and features, which are the most
+        expensive part) are prepared in parallel and the main process only
+        writes them. Files that can't be decoded (see `try_read_audio`) or are
+        too long are reported in errors and left out.
+
+        Returns:
+            A `tuple` (examples, errors), where examples is a list of (split,
+            uuid, label, length, record, features) tuples with the number of
+            samples, serialized `Example` and serialized features (or `None`).
+        """
+
+        examples, errors = [], []
+        for path, label, data in unit:
+            pcm, error = try_read_audio(path, self.sample_rate, data=data)
+            if error is not None: errors.append(error)
+            elif self.max_audio_size is not None and len(pcm) > self.max_audio_size:
+                errors.append("Long file: " + path)
+            else:
+                uuid = self.make_uuid(path)
+                features = self.encode_features(uuid, pcm) if self.features is not None else None
+                examples.append((split, uuid, label, len(pcm) // 2, self.encode(uuid, pcm), features))
+
+        return examples, errors
+
+    def finish(self, split, names, dones):
+        """Combines per-shard results into split metadata and writes it."""
+
+        metadata = {
+            "name": self.name,
+            "license": self.license,
+            "sample_rate": self.sample_rate,
+            "dtype": _tf.float32,
+            "format": self.format,
+        }
+        metadata.update(collect_shards(names, dones, self.features))
+        self.write_metadata(split, metadata)
+
+        return metadata
+
+    def make_uuid(self, path):
+        """Returns uuid of an example derived from the path of its audio file."""
+
+        return str(_uuid5(_NAMESPACE_URL, self.name + "/" + path))
+
+    def record_size(self, audio_size):
+        """Returns exact size of the record for audio data of the given size."""
+
+        # uuids are always 36 characters long
+        if self.format == "pcm16": return record_size({ "uuid": 36, "pcm": audio_size })
+        return record_size({ "uuid": 36, "audio": audio_size * 2 }) # 2 -> 4 bytes per sample
+
+    def encode(self, uuid, pcm):
+        """Returns serialized `Example` with uuid and audio data."""
+
+        audio = { "pcm": pcm } if self.format == "pcm16" else \
+            { "audio": _np.frombuffer(pcm, "<i2").astype("<f4") / 32768 }
+        return encode_example(dict(uuid=uuid.encode("utf-8"), **audio))
+
+    def encode_features(self, uuid, pcm):
+        """Returns serialized `Example` with uuid and features of audio data.
+
+        See `compute_features` and `quantize_features`.
+        """
+
+        features = compute_features(pcm, self.sample_rate, self.features)
+        return encode_example(dict(uuid=uuid.encode("utf-8"),
+            **quantize_features(features, self.features["dtype"])
+        ))
+
+    def write_shards(self, rows, templ):
+        """Packs examples into shards and writes them.
+
+        Shards which have already been written from the same inputs (see
+        `Builder.read_manifest`) are skipped.
+
+        Args:
+            rows: A list of examples in the form { "uuid", "path", "audio_size",
+                "label" }.
+            templ: Template of shard names with index and total placeholders.
+
+        Returns:
+            A `tuple` (names, results), where results are per-shard results
+            returned by `Builder.write_shard`.
+        """
+
+        sizes = [ self.record_size(row["audio_size"]) for row in rows ]
+        shards = [ [ rows[n] for n in indices ] for indices in pack_shards(sizes, self.max_shard_size) ]
+        total = len(shards)
+
+        names = [ templ.format(index, total) for index in range(total) ]
+        inputs = [ shard_inputs(shard, self.features) for shard in shards ]
+
+        dones = [ self.read_manifest(name, digest) for name, digest in zip(names, inputs) ]
+        todo = [ n for n, done in enumerate(dones) if done is None ]
+        self._print("Shards already written:", total - len(todo), "of", total)
+
+        # "spawn" is used because TensorFlow is not fork-safe
+        context = _multiprocessing.get_context("spawn")
+        with _ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+            results = pool.map(self.write_shard,
+                [ shards[n] for n in todo ], [ names[n] for n in todo ], [ inputs[n] for n in todo ]
+            )
+            for n, done in zip(todo, self._progress(results, len(todo))): dones[n] = done
+
+        errors = [ error for done in dones for error in done.get("errors", []) ]
+        if errors:
+            self._print("\nErrors:")
+            for error in errors: self._print(error)
+
+        return names, dones
+
+    def write_shard(self, shard, name, inputs):
+        """Writes shard and records it in the manifest.
+
+        Args:
+            shard: A list of examples (see `Builder.write_shards`).
+            name: Name of the `TFRecord` file.
+            inputs: Digest of the examples (see `shard_inputs`).
+
+        Examples whose audio can't be read (see `try_read_audio`) are left
+        out of the shard and listed in "errors", so one bad file doesn't stop
+        the build (or its resumption).
+
+        Returns:
+            A `dict` of shard results in the form { "inputs", "labels",
+            "lengths", "index", "checksum", "size", "errors" }, plus "features"
+            in the form { "checksum", "size" } if features are written.
+        """
+
+        path = self._output(name)
+        features_path = self._output(features_name(name))
+        labels, lengths, index, errors = {}, {}, {}, []
+        offset = 0
+
+        with _tf.io.TFRecordWriter(path) as file, _FeatureWriter(features_path, self.features) as features:
+            for row in shard:
+                uuid = row["uuid"]
+                audio_path = _os.path.join(self.input_path, row["path"])
+                pcm, error = try_read_audio(audio_path, self.sample_rate, size=row["audio_size"])
+                if error is not None:
+                    errors.append(error)
+                    continue
+
+                record = self.encode(uuid, pcm)
+                file.write(record)
+                if self.features is not None: features.write(self.encode_features(uuid, pcm))
+
+                # each record is framed with 8-byte length and two 4-byte CRCs
+                size = len(record) + 16
+
+                labels[uuid] = row["label"]
+                lengths[uuid] = len(pcm) // 2 # number of samples
+                index[uuid] = (offset, size)
+                offset += size
+
+        entry = {
+            "inputs": inputs, "labels": labels, "lengths": lengths, "index": index,
+            "checksum": md5sum(path), "size": _tf.io.gfile.stat(path).length, "errors": errors,
+        }
+        if self.features is not None: entry["features"] = {
+            "checksum": md5sum(features_path), "size": _tf.io.gfile.stat(features_path).length,
+        }
+        self.write_manifest(name, entry)
+        return entry
+
+    def read_manifest(self, name, inputs):
+        """Returns saved results of a shard (see `Builder.write_shard`).
+
+        Returns `None` if the shard hasn't been written from the same inputs or
+        its file is missing or has a different size.
+        """
+
+        entry_path = self._output("manifest", name + ".pickle")
+        if not _tf.io.gfile.exists(entry_path): return None
+
+        entry = read_data(entry_path)
+        if entry["inputs"] != inputs: return None
+
+        files = [ (name, entry["size"]) ]
+        if "features" in entry: files.append((features_name(name), entry["features"]["size"]))
+
+        for name, size in files:
+            path = self._output(name)
+            if not _tf.io.gfile.exists(path) or _tf.io.gfile.stat(path).length != size: return None
+
+        return entry
+
+    def write_manifest(self, name, entry):
+        """Saves results of a shard in the manifest."""
+
+        entry_path = self._output("manifest", name + ".pickle")
+        _write_file(entry_path, _pickle.dumps(entry))
+
+    def write_metadata(self, split, metadata):
+        """Writes split metadata in .pickle and .columns formats."""
+
+        path = self._output(split + ".pickle")
+        self._print("Saving metadata to:", path)
+        _write_file(path, _pickle.dumps(metadata))
+
+        # columnar metadata is read lazily by open_speech.DataSplit, while
+        # .pickle is kept for older versions of open_speech
+        path = self._output(split + ".columns")
+        self._print("Saving metadata to:", path)
+        _write_column_metadata(path, metadata)
+
+    def _output(self, *names):
+        return _os.path.join(self.output_path, *names)
+
+    def _print(self, *args):
+        if self.progress: print(*args)
+
+    def _progress(self, iterable, total):
+        if not self.progress: return iterable
+
+        try: from tqdm.auto import tqdm
+        except ImportError: return iterable
+        return tqdm(iterable, total=total)
+
+def read_audio(path, sample_rate, size=None, data=None):
+    """Reads audio file as raw 16-bit little-endian mono PCM data.
+
+    16-bit mono WAV files at `sample_rate` are read as is. Other files are
+    decoded and resampled using PyAV.
+
+    Length of compressed audio in the file header (see `read_audio_size`) can
+    differ from the decoded length by a few milliseconds (eg, due to MP3
+    encoder padding or resampling), so if `size` is given, decoded data is
+    trimmed or zero-padded to exactly that size. This keeps record sizes known
+    before decoding (see `pack_shards`).
+
+    Args:
+        path: Path to the audio file.
+        sample_rate: Target sample rate.
+        size: Expected size of the data in bytes, or `None`.
+        data: Contents of the file if it has already been read (eg, from an
+            archive), in which case `path` is only used to detect its format.
+
+    Returns:
+        Audio data as `bytes`.
+
+    Raises:
+        ValueError: If the decoded length differs from `size` by more than 0.1
+            seconds.
+    """
+
+    file = path if data is None else _io.BytesIO(data)
+
+    data = _read_wav(path, file, sample_rate, frames=True)
+    if data is None: data = _decode_audio(file, sample_rate)
+
+    if size is None or len(data) == size: return data
+
+    if abs(len(data) - size) > 2 * sample_rate // 10: raise ValueError(
+        "Decoded {} bytes of audio, expected {}: {}".format(len(data), size, path)
+    )
+    return data[:size] + bytes(max(0, size - len(data)))
+
+def try_read_audio(path, sample_rate, size=None, data=None):
+    """Same as `read_audio`, but reports files that can't be read instead of raising.
+
+    Returns:
+        A `tuple` (pcm, None), or (None, error) if the file can't be decoded or
+        its size doesn't match.
+    """
+
+    try: return read_audio(path, sample_rate, size=size, data=data), None
+    except ImportError: raise # eg, PyAV is missing, which affects all files
+    except Exception as error: # eg, av.error.FFmpegError, wave.Error or ValueError
+        return None, "Failed to read: {} ({})".format(path, error)
+
+def read_audio_size(path, sample_rate, data=None):
+    """Returns size of audio data in a file without decoding it.
+
+    Size of WAV files that are read as is (see `read_audio`) is read from the
+    header. Size of other files is computed from their duration at
+    `sample_rate` (exact for FLAC and WAV, estimated by the decoder for MP3).
+
+    Args:
+        path: Path to the audio file.
+        sample_rate: Target sample rate.
+        data: Contents of the file (see `read_audio`).
+
+    Returns:
+        Size of 16-bit mono PCM data in bytes.
+    """
+
+    file = path if data is None else _io.BytesIO(data)
+
+    size = _read_wav(path, file, sample_rate, frames=False)
+    if size is not None: return size
+
+    with _av.open(file) as container:
+        stream = container.streams.audio[0]
+        if stream.duration is not None: seconds = stream.duration * stream.time_base
+        else: seconds = container.duration / _av.time_base
+
+    return round(seconds * sample_rate) * 2
+
+def try_read_audio_size(path, sample_rate, data=None):
+    """Same as `read_audio_size`, but reports files that can't be read instead of raising.
+
+    Returns:
+        A `tuple` (size, None), or (None, error) if the file can't be read.
+    """
+
+    try: return read_audio_size(path, sample_rate, data=data), None
+    except ImportError: raise # eg, PyAV is missing, which affects all files
+    except Exception as error: # eg, av.error.FFmpegError or wave.Error
+        return None, "Failed to read: {} ({})".format(path, error)
+
+def _read_wav(path, file, sample_rate, frames):
+    """Reads 16-bit mono WAV file at `sample_rate` without decoding.
+
+    Returns audio data (or its size if `frames` is `False`), or `None` if the
+    file is not such WAV file.
+    """
+
+    if not path.lower().endswith(".wav"): return None
+
+    try:
+        with _wave.open(file, "rb") as wav:
+            if (wav.getsampwidth(), wav.getnchannels(), wav.getframerate()) != (2, 1, sample_rate):
+                return None
+            return wav.readframes(wav.getnframes()) if frames else wav.getnframes() * 2
+
+    except _wave.Error: return None # eg, float samples
+
+    finally:
+        if not isinstance(file, str): file.seek(0)
+
+def _decode_audio(file, sample_rate):
+    """Decodes and resamples audio file (path or file object) into 16-bit mono PCM data."""
+
+    resampler = _av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+
+    data = bytearray()
+    with _av.open(file) as container:
+        for frame in container.decode(audio=0):
+            frame.pts = None # timestamps are irrelevant and may be broken
+            for output in _frames(resampler.resample(frame)):
+                data += bytes(output.planes[0])[:output.samples * 2]
+
+        for output in _frames(resampler.resample(None)): # flush
+            data += bytes(output.planes[0])[:output.samples * 2]
+
+    return bytes(data)
+
+def _frames(result):
+    """Returns result of `AudioResampler.resample` as a list (PyAV < 9 returns a single frame)."""
+
+    if result is None: return []
+    return result if isinstance(result, list) else [ result ]
+
+class _ShardSink:
+    """Writes examples of a split into shards as they come (see `Builder.build_archives`)."""
+
+    def __init__(self, builder, split, rng, width=16):
+        self.builder = builder
+        self.split = split
+        self.rng = rng
+        self.width = width
+        self.count = 0
+
+        self._open = [] # shards being written: [ name, writer, result, offset, feature writer ]
+        self._dones = {} # finished shards in the form index: result
+        self._next = 0
+
+    def write(self, uuid, label, length, record, features=None):
+        """Writes encoded example (and its features) into one of the open shards."""
+
+        size = len(record) + 16 # framed with 8-byte length and two 4-byte CRCs
+
+        if len(self._open) < self.width:
+            slot = len(self._open)
+            self._open.append(self._start())
+        else: slot = self.rng.randrange(self.width)
+
+        shard = self._open[slot]
+        if shard[3] > 0 and shard[3] + size > self.builder.max_shard_size:
+            self._finish(shard)
+            shard = self._open[slot] = self._start()
+
+        name, writer, result, offset, feature_writer = shard
+        writer.write(record)
+        if features is not None: feature_writer.write(features)
+
+        result["labels"][uuid] = label
+        result["lengths"][uuid] = length
+        result["index"][uuid] = (offset, size)
+        shard[3] += size
+        self.count += 1
+
+    def close(self):
+        """Finishes all shards and gives them their final names.
+
+        Returns:
+            A `tuple` (names, results) of all shards (see `Builder.write_shards`).
+        """
+
+        for shard in self._open: self._finish(shard)
+        self._open = []
+
+        total = len(self._dones)
+        names = [ "{}-{:04d}-of-{:04d}.tfrec".format(self.split, index, total) for index in range(total) ]
+        for index, name in enumerate(names):
+            _tf.io.gfile.rename(self._path(index), self.builder._output(name), overwrite=True)
+            if self.builder.features is not None: _tf.io.gfile.rename(
+                features_name(self._path(index)), self.builder._output(features_name(name)), overwrite=True
+            )
+
+        return names, [ self._dones[index] for index in range(total) ]
+
+    def _start(self):
+        index, self._next = self._next, self._next + 1
+        path = self._path(index)
+        writer = _tf.io.TFRecordWriter(path)
+        features = _FeatureWriter(features_name(path), self.builder.features)
+        return [ index, writer, { "labels": {}, "lengths": {}, "index": {} }, 0, features ]
+
+    def _finish(self, shard):
+        index, writer, result, _, features = shard
+        writer.close()
+        features.close()
+
+        path = self._path(index)
+        result.update(checksum=md5sum(path), size=_tf.io.gfile.stat(path).length)
+        if self.builder.features is not None:
+            path = features_name(path)
+            result["features"] = { "checksum": md5sum(path), "size": _tf.io.gfile.stat(path).length }
+        self._dones[index] = result
+
+    def _path(self, index):
+        return self.builder._output("{}-{:04d}.part.tfrec".format(self.split, index))
+
+class _FeatureWriter:
+    """Writes feature shard, or does nothing if features are not enabled."""
+
+    def __init__(self, path, features):
+        self._writer = _tf.io.TFRecordWriter(path) if features is not None else None
+
+    def write(self, record):
+        self._writer.write(record)
+
+    def close(self):
+        if self._writer is not None: self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def feature_params(features, sample_rate):
+    """Validates feature parameters and fills in the defaults.
+
+    Args:
+        features: A `dict` of parameters (see `feature_defaults`). Missing ones
+            take their default values.
+        sample_rate: Audio sample rate.
+
+    Returns:
+        A `dict` of all parameters, as stored in split metadata, plus "depth",
+        which is the number of features per frame.
+    """
+
+    unknown = set(features) - set(feature_defaults)
+    if unknown: raise ValueError("Unknown feature parameters: {}".format(", ".join(sorted(unknown))))
+
+    params = dict(feature_defaults, **features)
+    if params["type"] not in feature_types: raise ValueError("Unknown feature type: {}".format(params["type"]))
+    if params["dtype"] not in feature_dtypes: raise ValueError("Unknown feature dtype: {}".format(params["dtype"]))
+
+    if params["fft_length"] is None: params["fft_length"] = 1 << (params["frame_length"] - 1).bit_length()
+    if params["fft_length"] < params["frame_length"]: raise ValueError("fft_length is shorter than frame_length")
+    if params["upper_edge_hertz"] > sample_rate / 2: raise ValueError("upper_edge_hertz is above the Nyquist frequency")
+
+    if params["type"] == "mfcc":
+        if params["num_mfccs"] > params["num_mel_bins"]: raise ValueError("num_mfccs is greater than num_mel_bins")
+        params["depth"] = params["num_mfccs"]
+    else: params["depth"] = params["num_mel_bins"]
+
+    return params
+
+def features_name(name):
+    """Returns name of the feature shard for an audio shard (eg, "train-0000-of-0010.features.tfrec")."""
+
+    return _os.path.splitext(name)[0] + ".features.tfrec"
+
+def compute_features(pcm, sample_rate, params):
+    """Computes log-mel spectrogram or MFCCs of 16-bit PCM data.
+
+    Features are computed the same way as with `tf.signal.stft` (periodic Hann
+    window, no padding at the end), `tf.signal.linear_to_mel_weight_matrix`
+    applied to the magnitude spectrum, natural log with 1e-6 offset and
+    `tf.signal.mfccs_from_log_mel_spectrograms`, so models can be trained on
+    pre-computed features and served on features computed from raw audio.
+
+    Args:
+        pcm: Raw 16-bit little-endian mono PCM data.
+        sample_rate: Audio sample rate.
+        params: Feature parameters (see `feature_params`).
+
+    Returns:
+        A [frames, depth] `np.float32` array. Audio shorter than one frame
+        yields zero frames.
+    """
+
+    audio = _np.frombuffer(pcm, "<i2").astype("f4") / 32768
+    length, step = params["frame_length"], params["frame_step"]
+
+    count = max(0, 1 + (len(audio) - length) // step)
+    frames = audio[_np.arange(count)[:, None] * step + _np.arange(length)] * _hann_window(length)
+
+    spectrum = _np.abs(_np.fft.rfft(frames, n=params["fft_length"])).astype("f4")
+    features = _np.log(spectrum @ _mel_matrix(params["num_mel_bins"], params["fft_length"] // 2 + 1,
+        sample_rate, params["lower_edge_hertz"], params["upper_edge_hertz"]
+    ) + 1e-6)
+
+    if params["type"] == "mfcc": features = features @ _dct_matrix(params["num_mel_bins"])[:, :params["num_mfccs"]]
+    return features.astype("f4")
+
+def quantize_features(features, dtype):
+    """Converts features into `Example` values (see `parse_features`).
+
+    With "float16", values are stored as is. With "int8", each example is
+    linearly mapped onto [-128, 127] and its scale and offset are stored along
+    with it, so that value = (q + 128) * scale + offset.
+
+    Returns:
+        A `dict` of features for `encode_example`.
+    """
+
+    if dtype == "float16": return { "features": features.astype("<f2").tobytes() }
+
+    offset = features.min() if features.size else 0.0
+    scale = (features.max() - offset) / 255 if features.size else 0.0
+    if scale == 0: scale = 1.0
+
+    values = _np.round((features - offset) / scale) - 128
+    return {
+        "features": _np.clip(values, -128, 127).astype("i1").tobytes(),
+        "scale": _np.array([ scale ], "f4"),
+        "offset": _np.array([ offset ], "f4"),
+    }
+
+@_functools.lru_cache(maxsize=None)
+def _hann_window(length):
+    return (0.5 - 0.5 * _np.cos(2 * _np.pi * _np.arange(length) / length)).astype("f4")
+
+def _hertz_to_mel(hertz):
+    return 1127.0 * _np.log(1.0 + hertz / 700.0)
+
+@_functools.lru_cache(maxsize=None)
+def _mel_matrix(num_mel_bins, num_spectrogram_bins, sample_rate, lower_edge_hertz, upper_edge_hertz):
+    """Returns mel filterbank (see `tf.signal.linear_to_mel_weight_matrix`)."""
+
+    mels = _hertz_to_mel(_np.linspace(0.0, sample_rate / 2, num_spectrogram_bins)[1:, None])
+    edges = _np.linspace(_hertz_to_mel(lower_edge_hertz), _hertz_to_mel(upper_edge_hertz), num_mel_bins + 2)
+    lower, center, upper = edges[:-2], edges[1:-1], edges[2:]
+
+    weights = _np.maximum(0.0, _np.minimum((mels - lower) / (center - lower), (upper - mels) / (upper - center)))
+    return _np.pad(weights, [ (1, 0), (0, 0) ]).astype("f4") # DC bin has zero weight
+
+@_functools.lru_cache(maxsize=None)
+def _dct_matrix(size):
+    """Returns DCT-II matrix scaled as in `tf.signal.mfccs_from_log_mel_spectrograms`."""
+
+    n, k = _np.arange(size)[:, None], _np.arange(size)
+    return (2 * _np.cos(_np.pi * k * (2 * n + 1) / (2 * size)) / _np.sqrt(2 * size)).astype("f4")
+
+def _strip_files(features):
+    """Returns feature parameters from split metadata without the file lists."""
+
+    if features is None: return None
+    return { name: value for name, value in features.items() if name not in [ "files", "checksums", "sizes" ] }
+
+def read_archive(path):
+    """Reads examples from a tar archive as a stream.
+
+    Members of the archive are grouped into units by directory, where audio
+    files in "wav", "flac" or "mp3" subdirectory and prompts in "etc"
+    subdirectory belong to the parent directory (eg, a VoxForge session).
+    Members of each unit are expected to be stored together, which is the case
+    for archives created from a directory tree. Audio data of a unit is kept in
+    memory until the next unit starts.
+
+    Prompt files (see `prompt_names`) and LibriSpeech transcripts (named
+    "*.trans.txt") contain one example per line in the form "name label",
+    where name is the audio file name without extension (possibly with a
+    path, which is ignored).
+
+    Args:
+        path: Path to the archive (see `tf.io.gfile`).
+
+    Yields:
+        (unit, errors) tuples, where unit is a list of (path, label, data)
+        tuples with path of the audio member and its contents.
+    """
+
+    unit, audio, prompts = None, {}, {}
+    with _tf.io.gfile.GFile(path, "rb") as file, _tarfile.open(fileobj=file, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile(): continue
+
+            name = member.name
+            base, ext = _os.path.splitext(_os.path.basename(name))
+            is_audio = ext.lower() in audio_types
+            is_prompts = _os.path.basename(name) in prompt_names or name.endswith(prompt_suffix)
+            if not is_audio and not is_prompts: continue
+
+            member_unit = _unit(name)
+            if member_unit != unit:
+                if unit is not None: yield _match(unit, audio, prompts)
+                unit, audio, prompts = member_unit, {}, {}
+
+            data = tar.extractfile(member).read()
+            if is_audio: audio[base] = (name, data)
+            else: prompts[_os.path.basename(name)] = data.decode("utf-8", errors="replace")
+
+    if unit is not None: yield _match(unit, audio, prompts)
+
+def parse_prompts(text):
+    """Parses prompts or transcript file (see `read_archive`).
+
+    Returns:
+        A `dict` in the form "name": "label".
+    """
+
+    labels = {}
+    for row in text.splitlines():
+        try: name, label = row.split(" ", 1)
+        except ValueError: continue
+
+        labels[_os.path.basename(name)] = label
+
+    return labels
+
+def _unit(name):
+    """Returns unit (directory) of an archive member (see `read_archive`)."""
+
+    unit = _os.path.dirname(name)
+    if _os.path.basename(unit) in [ "wav", "flac", "mp3", "etc" ]: unit = _os.path.dirname(unit)
+    return unit
+
+def _match(unit, audio, prompts):
+    """Matches audio of a unit with labels from its prompts file."""
+
+    # LibriSpeech transcripts, or the preferred VoxForge prompts file
+    names = [ name for name in prompts if name.endswith(prompt_suffix) ] + \
+        [ name for name in prompt_names if name in prompts ]
+    if not names: return [], [ "Missing prompts: " + unit ] if audio else []
+
+    examples, errors = [], []
+    for base, label in parse_prompts(prompts[names[0]]).items():
+        if base not in audio:
+            errors.append("Missing file: " + _os.path.join(unit, base))
+            continue
+
+        name, data = audio[base]
+        examples.append((name, label, data))
+
+    return examples, errors
+
+def weighted_split(uuid, weights):
+    """Assigns example to a split based on its uuid.
+
+    The same uuid is always assigned to the same split, so splits don't change
+    between builds or between building from archives and from JSON lines files.
+
+    Args:
+        uuid: Uuid of the example (see `Builder.make_uuid`).
+        weights: A `dict` mapping split names to their weights.
+
+    Returns:
+        Name of the split.
+    """
+
+    value = _random.Random(uuid).random() * sum(weights.values())
+    for split, weight in weights.items():
+        value -= weight
+        if value < 0: return split
+    return split
+
+def _bounded_map(pool, fn, iterable, ahead):
+    """Same as `pool.map`, but submits at most `ahead` items at a time.
+
+    Arguments are tuples, which are unpacked when calling `fn`.
+    """
+
+    futures = _deque()
+    for args in iterable:
+        futures.append(pool.submit(fn, *args))
+        if len(futures) >= ahead: yield futures.popleft().result()
+
+    while futures: yield futures.popleft().result()
+
+def read_rows(path):
+    """Reads examples from a JSON lines file one at a time."""
+
+    with _tf.io.gfile.GFile(path, "r") as file:
+        for line in file:
+            if line.strip(): yield _json.loads(line)
+
+def shard_inputs(shard, features=None):
+    """Returns digest of everything that goes into a shard (and its feature shard)."""
+
+    rows = [ (row["uuid"], row["path"], row["label"], row["audio_size"]) for row in shard ]
+    if features is not None: rows.append(sorted(features.items()))
+    return _hashlib.md5(repr(rows).encode("utf-8")).hexdigest()
+
+def pack_shards(sizes, max_size):
+    """Packs records into shards using their exact sizes.
+
+    Records are assigned in the given (shuffled) order, each to the least
+    filled shard. Shards are planned with room for one extra record each, so
+    none of them exceeds `max_size` and all are filled to within one record of
+    each other. Records of `max_size` or larger get a shard of their own.
+
+    Args:
+        sizes: A list of record sizes.
+        max_size: Maximum size of a shard.
+
+    Returns:
+        A `list` of shards, each of which is a `list` of record indices.
+    """
+
+    large = [ [ index ] for index, size in enumerate(sizes) if size >= max_size ]
+    small = [ (index, size) for index, size in enumerate(sizes) if size < max_size ]
+    if not small: return large
+
+    total, largest = sum(size for _, size in small), max(size for _, size in small)
+    num_shards = min(len(small), _math.ceil(total / (max_size - largest)))
+
+    shards = [ [] for _ in range(num_shards) ]
+    heap = [ (0, shard) for shard in range(num_shards) ]
+    for index, size in small:
+        filled, shard = heap[0]
+        shards[shard].append(index)
+        _heapq.heapreplace(heap, (filled + size, shard))
+
+    return shards + large
+
+def check_appendable(metadata, path):
+    """Checks that examples can be appended to an existing split.
+
+    Splits created before the builder (with uuid1 ids and no index, lengths or
+    sizes) can't be appended to, since new examples couldn't be told apart
+    from the existing ones and existing shards couldn't be described.
+
+    Raises:
+        ValueError: If the split can't be appended to.
+    """
+
+    missing = [ name for name in [ "index", "lengths", "sizes", "checksums" ] if name not in metadata ]
+    if missing: raise ValueError(
+        "Can't append to split without {} in its metadata (rebuild it instead): {}".format(", ".join(missing), path)
+    )
+
+    if any(_uuid_version(uuid) != 5 for uuid in metadata["labels"]): raise ValueError(
+        "Can't append to split with non-uuid5 ids (rebuild it instead): " + path
+    )
+
+def _uuid_version(uuid):
+    try: return _UUID(uuid).version
+    except ValueError: return None
+
+def split_shards(metadata):
+    """Returns per-shard results of an existing split (see `Builder.write_shard`)."""
+
+    dones = [
+        { "labels": {}, "lengths": {}, "index": {}, "checksum": checksum, "size": size }
+            for checksum, size in zip(metadata["checksums"], metadata["sizes"])
+    ]
+    if "features" in metadata:
+        features = metadata["features"]
+        for done, checksum, size in zip(dones, features["checksums"], features["sizes"]):
+            done["features"] = { "checksum": checksum, "size": size }
+    for uuid, (shard, offset, size) in metadata["index"].items():
+        dones[shard]["labels"][uuid] = metadata["labels"][uuid]
+        dones[shard]["lengths"][uuid] = metadata["lengths"][uuid]
+        dones[shard]["index"][uuid] = (offset, size)
+
+    return dones
+
+def collect_shards(names, dones, features=None):
+    """Combines per-shard results into split metadata.
+
+    If `features` parameters are given, they are stored in "features" along
+    with the files, checksums and sizes of the feature shards.
+    """
+
+    labels = { uuid: label for done in dones for uuid, label in done["labels"].items() }
+    lengths = { uuid: length for done in dones for uuid, length in done["lengths"].items() }
+    index = {
+        uuid: (shard, offset, size) for shard, done in enumerate(dones)
+            for uuid, (offset, size) in done["index"].items()
+    }
+
+    metadata = {
+        "files": list(names),
+        "checksums": [ done["checksum"] for done in dones ],
+        "sizes": [ done["size"] for done in dones ],
+        "stats": make_stats([ list(done["lengths"].values()) for done in dones ], labels.values()),
+        "labels": labels,
+        "lengths": lengths,
+        "index": index,
+    }
+    if features is not None: metadata["features"] = dict(features,
+        files=[ features_name(name) for name in names ],
+        checksums=[ done["features"]["checksum"] for done in dones ],
+        sizes=[ done["features"]["size"] for done in dones ],
+    )
+
+    return metadata
+
+def encode_example(features):
+    """Serializes `Example` without building the protobuf message.
+
+    The record is assembled from the feature data and field headers with a
+    single copy of the data, which is several times faster than filling in and
+    serializing `tf.train.Example` for large audio features.
+
+    Args:
+        features: A `dict` in the form "name": value, where value is `bytes`
+            (stored as a bytes list with one value) or a 1-D `np.float32`
+            array (stored as a float list).
+
+    Returns:
+        Serialized instance of `Example`.
+    """
+
+    parts = []
+    for name, value in features.items():
+        if isinstance(value, bytes): kind = 1 # Feature.bytes_list
+        else: kind, value = 2, value.astype("<f4").tobytes() # Feature.float_list
+
+        key = name.encode("utf-8")
+        values = _header(1, len(value)) # BytesList.value or packed FloatList.value
+        feature = _header(kind, len(values) + len(value))
+        feature_size = len(feature) + len(values) + len(value)
+
+        entry = _header(1, len(key)) + key + _header(2, feature_size) # map entry: key, value
+        parts += [ _header(1, len(entry) + feature_size), entry, feature, values, value ]
+
+    return b"".join([ _header(1, sum(map(len, parts))) ] + parts) # Example.features
+
+def record_size(value_sizes):
+    """Returns exact size of a `TFRecord` record produced by `encode_example`.
+
+    Args:
+        value_sizes: A `dict` in the form "name": size, where size is the size
+            of the feature data in bytes.
+
+    Returns:
+        Size of the record including framing.
+    """
+
+    # length-delimited field: tag, varint length, data
+    def field(size): return 1 + _varint_size(size) + size
+
+    features = 0
+    for name, size in value_sizes.items():
+        feature = field(field(size))
+        features += field(field(len(name.encode("utf-8"))) + field(feature))
+
+    # framed with 8-byte length and two 4-byte CRCs
+    return field(features) + 16
+
+def md5sum(path, chunk_size=1024 ** 2):
+    """Computes MD5 hex digest of a file (see `tf.io.gfile`)."""
+
+    md5 = _hashlib.md5()
+    with _tf.io.gfile.GFile(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+def _header(number, size):
+    """Returns tag and length of a length-delimited protobuf field."""
+
+    return _varint(number << 3 | 2) + _varint(size)
+
+def _varint(value):
+    data = bytearray()
+    while value > 0x7f:
+        data.append(value & 0x7f | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+def _varint_size(value):
+    return max(1, (value.bit_length() + 6) // 7)
+
+def _write_file(path, data):
+    """Writes file atomically (see `tf.io.gfile.rename`)."""
+
+    temp = path + ".tmp"
+    with _tf.io.gfile.GFile(temp, "wb") as file:
+        file.write(data)
+    _tf.io.gfile.rename(temp, path, overwrite=True)
+
+def main(args=None):
+    """Command line entry point (see module docstring)."""
+
+    parser = _argparse.ArgumentParser(prog="open_speech.build",
+        description="Build open-speech dataset from audio files and labels."
+    )
+    parser.add_argument("corpus",
+        help="name of the dataset: one of {}, or any other name with --splits".format(", ".join(corpora))
+    )
+    parser.add_argument("input", help="directory containing <split>.jsonl files and audio files")
+    parser.add_argument("output", help="directory to write the dataset to (eg, gs://bucket/path)")
+    parser.add_argument("--splits", nargs="+", help="names of the splits to build")
+    parser.add_argument("--license", help="license of the dataset")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="audio sample rate")
+    parser.add_argument("--format", choices=formats, default="pcm16", help="audio format")
+    parser.add_argument("--max-shard-size", type=int, default=256, help="maximum shard size in MB")
+    parser.add_argument("--max-audio-size", type=int, default=max_audio_size,
+        help="maximum size of audio data in bytes; longer examples are discarded"
+    )
+    parser.add_argument("--workers", type=int, help="number of processes (defaults to number of CPUs)")
+    parser.add_argument("--seed", type=int, default=0, help="seed to shuffle examples with")
+    parser.add_argument("--append", action="store_true",
+        help="only write shards for examples which are not in the existing metadata and add them to it"
+    )
+    parser.add_argument("--archives", action="store_true",
+        help="read examples directly from .tar.gz or .tgz archives in the input directory"
+    )
+    parser.add_argument("--split-weights", nargs="+", metavar="SPLIT=WEIGHT",
+        help="with --archives, assign examples to splits using these weights (eg, train=8 valid=1 test=1)"
+    )
+
+    group = parser.add_argument_group("features", "write pre-computed features along with audio")
+    group.add_argument("--features", choices=feature_types, help="type of features to write")
+    group.add_argument("--feature-dtype", choices=feature_dtypes, default=feature_defaults["dtype"],
+        help="data type to store features as"
+    )
+    group.add_argument("--frame-length", type=int, default=feature_defaults["frame_length"], help="frame length in samples")
+    group.add_argument("--frame-step", type=int, default=feature_defaults["frame_step"], help="frame step in samples")
+    group.add_argument("--fft-length", type=int, help="FFT length (defaults to the smallest power of 2 >= frame length)")
+    group.add_argument("--mel-bins", type=int, default=feature_defaults["num_mel_bins"], help="number of mel bins")
+    group.add_argument("--mfccs", type=int, default=feature_defaults["num_mfccs"], help="number of MFCCs")
+    args = parser.parse_args(args)
+
+    corpus = corpora.get(args.corpus, {})
+    splits = args.splits or corpus.get("splits")
+    if not splits: parser.error("--splits is required for unknown corpus: " + args.corpus)
+
+    features = None
+    if args.features: features = {
+        "type": args.features, "dtype": args.feature_dtype,
+        "frame_length": args.frame_length, "frame_step": args.frame_step, "fft_length": args.fft_length,
+        "num_mel_bins": args.mel_bins, "num_mfccs": args.mfccs,
+    }
+
+    try: builder = Builder(args.corpus, _os.path.expanduser(args.input), _os.path.expanduser(args.output),
+        license=args.license or corpus.get("license"), sample_rate=args.sample_rate,
+        format=args.format, max_shard_size=args.max_shard_size * 1024 ** 2,
+        max_audio_size=args.max_audio_size, features=features, max_workers=args.workers, seed=args.seed
+    )
+    except ValueError as error: parser.error(str(error))
+
+    if args.archives:
+        if args.append: parser.error("--append can't be used with --archives")
+        if args.splits: parser.error("--splits can't be used with --archives (use --split-weights)")
+
+        weights = corpus.get("weights")
+        if args.split_weights:
+            weights = { split: float(weight) for split, weight in [ arg.split("=", 1) for arg in args.split_weights ] }
+
+        archives = {}
+        for pattern in [ "*.tar.gz", "*.tgz" ]:
+            for path in sorted(_tf.io.gfile.glob(_os.path.join(builder.input_path, pattern))):
+                name = _os.path.basename(path).split(".")[0]
+                split = corpus.get("archives", {}).get(name)
+                if split is None and weights is None: parser.error(
+                    "Unknown archive (use --split-weights): " + path
+                )
+                archives[path] = split
+
+        builder.build_archives(archives, weights)
+        return
+
+    for split in splits:
+        print("\nBuilding:", split)
+        try: builder.build(split, append=args.append)
+        except ValueError as error: parser.error(str(error))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import hashlib as _hashlib
+import os as _os
+import tempfile as _tempfile
+import threading as _threading
+
+from collections import deque as _deque
+
+from .util import _tf
+
+class ShardCache:
+    """Local on-disk cache of `TFRecord` files.
+
+    Files are copied into the cache directory on first use and read from the
+    local copy afterwards (including by later jobs using the same directory).
+    When total size of the cache exceeds `max_size`, least recently used files
+    are evicted, except for the `num_pinned` most recently fetched ones, which
+    may have been handed to a reader that hasn't opened them yet.
+
+    Copies are keyed by the source path and its checksum (if known), so a
+    shard rebuilt in place with a new checksum in the metadata is fetched
+    again rather than read from a stale copy.
+
+    Usage example:
+
+    cache = open_speech.ShardCache("/mnt/ssd/open-speech", max_size=500 * 1024**3)
+    dataset = open_speech.get_train_recordset(cache=cache)
+
+    Attributes:
+        path: Path to the cache directory.
+        max_size: Maximum total size of cached files in bytes (or `None` for no
+            limit).
+        num_pinned: Number of most recently fetched files that are never
+            evicted. Should be at least the number of files read in parallel
+            plus those fetched ahead of the reader.
+    """
+
+    def __init__(self, path, max_size=None, num_pinned=64):
+        self.path = _os.path.expanduser(path)
+        self.max_size = max_size
+        self.num_pinned = num_pinned
+        self._lock = _threading.Lock()
+        self._pinned = _deque(maxlen=num_pinned)
+
+        _os.makedirs(self.path, exist_ok=True)
+
+    def local_path(self, file, checksum=None):
+        """Returns path of the cached copy of `file`.
+
+        Shards from different datasets often share the same name (eg,
+        "train-0000-of-0631.tfrec"), so the name is prefixed with a hash of the
+        full source path and the checksum of the file.
+        """
+
+        key = file if checksum is None else file + ":" + checksum
+        prefix = _hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+        return _os.path.join(self.path, prefix + "-" + _os.path.basename(file))
+
+    def fetch(self, file, checksum=None):
+        """Returns path of the local copy of `file`, copying it if necessary.
+
+        Args:
+            file: Path to the source file (eg, "gs://bucket/train-0000.tfrec").
+            checksum: Expected MD5 hex digest of the file, if known.
+
+        Returns:
+            Path to the local copy.
+
+        Raises:
+            IOError: If checksum of the copied file doesn't match.
+        """
+
+        path = self.local_path(file, checksum)
+        if _os.path.exists(path):
+            try:
+                _os.utime(path) # mark as recently used
+                self._pin(path)
+                return path
+            except FileNotFoundError: pass # evicted in the meantime
+
+        fd, temp = _tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        _os.close(fd)
+        try:
+            _tf.io.gfile.copy(file, temp, overwrite=True)
+
+            if checksum is not None:
+                digest = md5sum(temp)
+                if digest != checksum: raise IOError(
+                    "Checksum mismatch for '{}': expected {}, got {}".format(file, checksum, digest)
+                )
+
+            _os.replace(temp, path)
+
+        finally:
+            if _os.path.exists(temp): _os.remove(temp)
+
+        self._pin(path)
+        self.evict()
+        return path
+
+    def evict(self, keep=None):
+        """Evicts least recently used files until the cache fits into `max_size`.
+
+        Pinned files (see `ShardCache.num_pinned`) are never evicted.
+
+        Args:
+            keep: Path of another file that should not be evicted.
+        """
+
+        if self.max_size is None: return
+
+        with self._lock:
+            pinned = set(self._pinned)
+            entries = []
+            for entry in _os.scandir(self.path):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_size: break
+                if path == keep or path in pinned: continue
+
+                try: _os.remove(path)
+                except FileNotFoundError: pass
+                total -= size
+
+    def clear(self):
+        """Removes all files from the cache.
+
+        Files being copied (*.tmp) are left alone.
+        """
+
+        with self._lock:
+            for entry in _os.scandir(self.path):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    try: _os.remove(entry.path)
+                    except FileNotFoundError: pass
+            self._pinned.clear()
+
+    def _pin(self, path):
+        with self._lock:
+            if path in self._pinned: self._pinned.remove(path)
+            self._pinned.append(path)
+
+def md5sum(path, chunk_size=1024 ** 2):
+    """Computes MD5 hex digest of a file.
+
+    Args:
+        path: Path to the local file.
+        chunk_size: Size of chunks to read the file in.
+
+    Returns:
+        MD5 hex digest of the file.
+    """
+
+    md5 = _hashlib.md5()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
@@ -0,0 +1,331 @@
+import argparse as _argparse
+import hashlib as _hashlib
+import json as _json
+import mmap as _mmap
+import struct as _struct
+import sys as _sys
+
+from array import array as _array
+from collections.abc import Mapping as _Mapping, Sequence as _Sequence
+from collections.abc import ItemsView as _ItemsView, ValuesView as _ValuesView
+
+from .util import _tf, load_data, read_file
+
+# Columnar metadata file layout (all integers are little-endian):
+#
+#   magic        8 bytes  b"OSCOLUMN"
+#   header_size  uint64
+#   header       JSON: {
+#                    "count": number of rows,
+#                    "digest": MD5 hex digest of the columns,
+#                    "attrs": { other metadata, eg "sample_rate": 16000 },
+#                    "columns": { name: { "type": "str" | "int64",
+#                                         "offset": ..., "size": ... } }
+#                }
+#   columns      "int64" column: `count` int64 values
+#                "str" column: `count + 1` uint64 offsets into the UTF-8 data
+#                that follows them
+#
+# Column offsets in the header are relative to the end of the header.
+#
+# Metadata of datasets built before columnar files were introduced can be
+# converted with:
+#
+#   python -m open_speech.columns gs://bucket/path/train.pickle ...
+#
+_magic = b"OSCOLUMN"
+
+class ColumnFile:
+    """Columnar metadata file.
+
+    Only the header is read when the file is opened; columns are read on first
+    access. Local files are memory-mapped and columns are read from the mapping
+    without copying; remote files (eg, "gs://...") are read one column at a
+    time.
+
+    Attributes:
+        path: Path to the file.
+        count: Number of rows.
+        digest: MD5 hex digest of the columns.
+        attrs: `dict` of additional (non-columnar) metadata.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._columns = {}
+        self._mmap = None
+
+        if "://" not in path:
+            with open(path, "rb") as file:
+                header = file.read(16)
+                # mmap can't map an empty file
+                if len(header) == 16: self._mmap = _mmap.mmap(file.fileno(), 0, access=_mmap.ACCESS_READ)
+        else:
+            header = read_file(path, 0, 16)
+
+        if len(header) < 16 or header[:8] != _magic: raise ValueError("Not a column file: " + path)
+        header_size = _struct.unpack("<Q", header[8:])[0]
+
+        header = _json.loads(bytes(self._read(16, header_size)).decode("utf-8"))
+        self.count = header["count"]
+        self.digest = header.get("digest")
+        self.attrs = header["attrs"]
+        self._specs = header["columns"]
+        self._start = 16 + header_size
+
+    @property
+    def names(self):
+        """Returns `list` of column names."""
+
+        return list(self._specs.keys())
+
+    def column(self, name):
+        """Returns column by name, reading it if necessary.
+
+        Returns:
+            A read-only sequence of `str` or `int` values.
+        """
+
+        if name not in self._columns:
+            spec = self._specs[name]
+            buffer = self._read(self._start + spec["offset"], spec["size"])
+
+            if spec["type"] == "str":
+                self._columns[name] = StringColumn(buffer, self.count)
+            elif spec["type"] == "int64":
+                self._columns[name] = _cast(buffer, "q")
+            else: raise ValueError("Unknown column type: " + spec["type"])
+
+        return self._columns[name]
+
+    def _read(self, offset, size):
+        if self._mmap is not None:
+            return memoryview(self._mmap)[offset : offset + size]
+        return memoryview(read_file(self.path, offset, size))
+
+class StringColumn(_Sequence):
+    """Read-only sequence of strings stored as UTF-8 data plus offsets.
+
+    Strings are decoded on access.
+    """
+
+    def __init__(self, buffer, count):
+        size = 8 * (count + 1)
+        self._offsets = _cast(buffer[:size], "Q")
+        self._data = buffer[size:]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ self[i] for i in range(*index.indices(len(self))) ]
+
+        if index < 0: index += len(self)
+        if not 0 <= index < len(self): raise IndexError("column index out of range")
+
+        return str(self._data[self._offsets[index] : self._offsets[index + 1]], "utf-8")
+
+    def __iter__(self):
+        data, offsets = self._data, self._offsets
+        for index in range(len(self)):
+            yield str(data[offsets[index] : offsets[index + 1]], "utf-8")
+
+class ColumnMapping(_Mapping):
+    """Read-only mapping between columns of a `ColumnFile`.
+
+    Values are taken from one column, or from several columns combined into
+    tuples if `values` is a tuple of column names.
+
+    Columns are read on first access. Looking up a key builds an index of all
+    keys, while iterating over keys, values or items doesn't.
+    """
+
+    def __init__(self, file, keys, values):
+        self._file = file
+        self._names = (keys, values)
+        self._index = None
+
+    @property
+    def _keys(self):
+        return self._file.column(self._names[0])
+
+    @property
+    def _values(self):
+        names = self._names[1]
+        if isinstance(names, tuple):
+            return _TupleColumn([ self._file.column(name) for name in names ])
+        return self._file.column(names)
+
+    def __getitem__(self, key):
+        if self._index is None:
+            self._index = { key: index for index, key in enumerate(self._keys) }
+        return self._values[self._index[key]]
+
+    def __len__(self):
+        return self._file.count
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def values(self):
+        return _ColumnValues(self)
+
+    def items(self):
+        return _ColumnItems(self)
+
+class _TupleColumn(_Sequence):
+    def __init__(self, columns):
+        self._columns = columns
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def __getitem__(self, index):
+        return tuple(column[index] for column in self._columns)
+
+    def __iter__(self):
+        return zip(*self._columns)
+
+class _ColumnValues(_ValuesView):
+    def __iter__(self):
+        return iter(self._mapping._values)
+
+class _ColumnItems(_ItemsView):
+    def __iter__(self):
+        return zip(self._mapping._keys, self._mapping._values)
+
+def read_metadata(path):
+    """Reads split metadata from a columnar metadata file.
+
+    Returns metadata in the same form as the .pickle file, except that "labels",
+    "lengths" and "index" are lazily read instances of `ColumnMapping`.
+
+    Args:
+        path: Path to the columnar metadata file.
+
+    Returns:
+        A `dict` of metadata.
+    """
+
+    file = ColumnFile(path)
+
+    metadata = dict(file.attrs)
+    metadata["digest"] = file.digest
+    metadata["labels"] = ColumnMapping(file, "uuid", "label")
+    if "length" in file.names:
+        metadata["lengths"] = ColumnMapping(file, "uuid", "length")
+    if "offset" in file.names:
+        metadata["index"] = ColumnMapping(file, "uuid", ("shard", "offset", "size"))
+
+    return metadata
+
+def write_metadata(path, metadata):
+    """Writes split metadata to a columnar metadata file.
+
+    The reverse of `read_metadata`: "labels", "lengths" and "index" are written
+    as columns (the latter two only if present, since older metadata doesn't
+    contain them) and everything else is stored as attributes.
+
+    Args:
+        path: Path to the file to write.
+        metadata: A `dict` of metadata in the same form as the .pickle file.
+    """
+
+    labels = metadata["labels"]
+    uuids = list(labels.keys())
+
+    columns = { "uuid": uuids, "label": [ labels[uuid] for uuid in uuids ] }
+    if "lengths" in metadata:
+        lengths = metadata["lengths"]
+        columns["length"] = [ lengths[uuid] for uuid in uuids ]
+    if "index" in metadata:
+        index = metadata["index"]
+        for n, name in enumerate([ "shard", "offset", "size" ]):
+            columns[name] = [ index[uuid][n] for uuid in uuids ]
+
+    attrs = { name: value for name, value in metadata.items() if name not in [ "labels", "lengths", "index", "digest" ] }
+    attrs["dtype"] = getattr(attrs["dtype"], "name", attrs["dtype"]) # tf.DType or its name
+
+    write_columns(path, columns, attrs)
+
+def write_columns(path, columns, attrs={}):
+    """Writes columnar metadata file.
+
+    Args:
+        path: Path to the file to write.
+        columns: A `dict` of columns in the form "name": values, where values is
+            a list of `str` or `int`. All columns must have the same length.
+        attrs: A `dict` of additional metadata. Must be JSON-serializable.
+    """
+
+    counts = set(len(values) for values in columns.values())
+    if len(counts) > 1: raise ValueError("Columns have different lengths")
+    count = counts.pop() if counts else 0
+
+    blobs, specs = [], {}
+    for name, values in columns.items():
+        if all(isinstance(value, str) for value in values):
+            data = [ value.encode("utf-8") for value in values ]
+            offsets = [ 0 ]
+            for value in data: offsets.append(offsets[-1] + len(value))
+            blob = _to_bytes(_array("Q", offsets)) + b"".join(data)
+            specs[name] = { "type": "str" }
+
+        else:
+            blob = _to_bytes(_array("q", values))
+            specs[name] = { "type": "int64" }
+
+        specs[name]["size"] = len(blob)
+        blobs.append(blob)
+
+    offset = 0
+    for spec in specs.values():
+        spec["offset"] = offset
+        offset += spec["size"]
+
+    md5 = _hashlib.md5()
+    for blob in blobs: md5.update(blob)
+
+    header = { "count": count, "digest": md5.hexdigest(), "attrs": attrs, "columns": specs }
+    header = _json.dumps(header).encode("utf-8")
+    with (open(path, "wb") if "://" not in path else _tf.io.gfile.GFile(path, "wb")) as file:
+        file.write(_magic + _struct.pack("<Q", len(header)) + header)
+        for blob in blobs: file.write(blob)
+
+def _cast(buffer, code):
+    """Casts buffer of little-endian data into a sequence of integers."""
+
+    if _sys.byteorder == "little": return buffer.cast(code)
+
+    values = _array(code, bytes(buffer))
+    values.byteswap()
+    return values
+
+def _to_bytes(values):
+    """Converts `array` of integers into little-endian bytes."""
+
+    if _sys.byteorder != "little": values.byteswap()
+    return values.tobytes()
+
+def main(args=None):
+    """Converts .pickle metadata files into columnar metadata files."""
+
+    parser = _argparse.ArgumentParser(prog="open_speech.columns",
+        description="Convert split metadata from .pickle to .columns format."
+    )
+    parser.add_argument("paths", nargs="+", metavar="path",
+        help="<split>.pickle file, or directory containing them (eg, gs://bucket/path)"
+    )
+    args = parser.parse_args(args)
+
+    for path in args.paths:
+        files = [ path ] if path.endswith(".pickle") else sorted(_tf.io.gfile.glob(path.rstrip("/") + "/*.pickle"))
+        if not files: parser.error("No .pickle files found in: " + path)
+
+        for file in files:
+            output = file[:-len(".pickle")] + ".columns"
+            print("Converting:", file, "->", output)
+            write_metadata(output, load_data(read_file(file)))
+
+if __name__ == "__main__": main()
@@ -1,4 +1,5 @@
 from .datasplit import DataSplit
+from .stats import Stats
 from .util import *
 
 class DataSet:
@@ -29,6 +30,30 @@ class DataSet:
         self.test  = DataSplit(path, "test" )
         self.valid = DataSplit(path, "valid")
 
+        self._labels = MergedMapping(lambda: [
+            self.train.labels, self.test.labels, self.valid.labels
+        ])
+        self._clean_labels = MergedMapping(lambda: [
+            self.train.clean_labels, self.test.clean_labels, self.valid.clean_labels
+        ])
+
+    def prefetch_metadata(self, wait=True):
+        """Reads metadata of all data splits in the dataset concurrently.
+
+        Metadata is otherwise read lazily, one split at a time, on first access
+        to any of the split properties. Prefetching it in parallel makes the
+        startup cost that of the slowest split.
+
+        Args:
+            wait: Whether to wait for the metadata to be read. If `False`,
+                metadata is read in the background.
+
+        Returns:
+            A `list` of `concurrent.futures.Future` (one per split).
+        """
+
+        return prefetch_metadata([ self.train, self.test, self.valid ], wait=wait)
+
     @property
     def sample_rate(self):
         """Returns audio sample rate."""
@@ -47,12 +72,32 @@ class DataSet:
         assert dtype == self.valid.dtype
         return dtype
 
+    @property
+    def format(self):
+        """Returns format of audio data in `TFRecord` files (see `parse_serial`).
+
+        Returns `None` if the splits use different formats.
+        """
+
+        format = self.train.format
+        return format if format == self.test.format == self.valid.format else None
+
     @property
     def files(self):
         """Returns list of all `TFRecord` files comprising the dataset."""
 
         return self.train.files + self.test.files + self.valid.files
 
+    @property
+    def stats(self):
+        """Returns precomputed statistics of all splits in the dataset (see `Stats`).
+
+        Returns `None` if metadata of any of the splits doesn't contain
+        statistics.
+        """
+
+        return Stats.merge([ self.train.stats, self.test.stats, self.valid.stats ])
+
     @property
     def train_labels(self):
         """Returns `dict` of training labels in the form "uuid": "label"."""
@@ -73,14 +118,47 @@ class DataSet:
 
     @property
     def labels(self):
-        """Returns `dict` of all dataset labels in the form "uuid": "label"."""
+        """Returns read-only mapping of all dataset labels in the form "uuid": "label".
+
+        The mapping is a view of the split labels (see `MergedMapping`), which
+        doesn't copy them.
+        """
+
+        return self._labels
 
-        return { **self.train_labels, **self.test_labels, **self.valid_labels }
+    @property
+    def clean_labels(self):
+        """Returns read-only mapping of all clean labels in the dataset.
 
-    def get_train_recordset(self, num_parallel_reads=AUTOTUNE):
-        """Returns training split recordset (see `DataSet.train_recordset`)."""
+        Labels are cleaned using `clean_many` once per version of the metadata
+        and cached on disk (see `DataSplit.clean_labels`).
+        """
 
-        return self.train.get_recordset(num_parallel_reads)
+        return self._clean_labels
+
+    @property
+    def alphabet(self):
+        """Returns sorted `list` of characters used in clean labels."""
+
+        splits = [ self.train, self.test, self.valid ]
+        return sorted(set(char for split in splits for char in split.alphabet))
+
+    @property
+    def max_label_length(self):
+        """Returns length of the longest clean label."""
+
+        return max(self.train.max_label_length, self.test.max_label_length,
+            self.valid.max_label_length
+        )
+
+    def get_train_recordset(self, num_parallel_reads=AUTOTUNE, **kwargs):
+        """Returns training split recordset (see `DataSet.train_recordset`).
+
+        Additional keyword arguments (eg, `cache` or `seed`) are passed through to
+        `get_recordset` of the split.
+        """
+
+        return self.train.get_recordset(num_parallel_reads, **kwargs)
 
     @property
     def train_recordset(self):
@@ -107,10 +185,14 @@ class DataSet:
 
         return self.get_train_recordset()
 
-    def get_valid_recordset(self, num_parallel_reads=AUTOTUNE):
-        """Returns validation split recordset (see `DataSet.valid_recordset`)."""
+    def get_valid_recordset(self, num_parallel_reads=AUTOTUNE, **kwargs):
+        """Returns validation split recordset (see `DataSet.valid_recordset`).
+
+        Additional keyword arguments (eg, `cache` or `seed`) are passed through to
+        `get_recordset` of the split.
+        """
 
-        return self.valid.get_recordset(num_parallel_reads)
+        return self.valid.get_recordset(num_parallel_reads, **kwargs)
 
     @property
     def valid_recordset(self):
@@ -137,10 +219,14 @@ class DataSet:
 
         return self.get_valid_recordset()
 
-    def get_test_recordset(self, num_parallel_reads=AUTOTUNE):
-        """Returns test split recordset (see `DataSet.test_recordset`)."""
+    def get_test_recordset(self, num_parallel_reads=AUTOTUNE, **kwargs):
+        """Returns test split recordset (see `DataSet.test_recordset`).
+
+        Additional keyword arguments (eg, `cache` or `seed`) are passed through to
+        `get_recordset` of the split.
+        """
 
-        return self.test.get_recordset(num_parallel_reads)
+        return self.test.get_recordset(num_parallel_reads, **kwargs)
 
     @property
     def test_recordset(self):
@@ -166,3 +252,27 @@ class DataSet:
         """
 
         return self.get_test_recordset()
+
+    def get_train_dataset(self, batch_size, **kwargs):
+        """Returns batched and parsed training split dataset.
+
+        See `DataSplit.get_dataset` for details.
+        """
+
+        return self.train.get_dataset(batch_size, **kwargs)
+
+    def get_valid_dataset(self, batch_size, **kwargs):
+        """Returns batched and parsed validation split dataset.
+
+        See `DataSplit.get_dataset` for details.
+        """
+
+        return self.valid.get_dataset(batch_size, **kwargs)
+
+    def get_test_dataset(self, batch_size, **kwargs):
+        """Returns batched and parsed test split dataset.
+
+        See `DataSplit.get_dataset` for details.
+        """
+
+        return self.test.get_dataset(batch_size, **kwargs)
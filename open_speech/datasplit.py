@@ -1,11 +1,26 @@
+import hashlib as _hashlib
+import os as _os
+import tempfile as _tempfile
+import threading as _threading
+
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
+
+from .columns import ColumnFile, ColumnMapping, read_metadata, write_columns
+from .stats import Stats
 from .util import *
+from .util import _tf
 
 class DataSplit:
     """Represents data split (training, validation or test) in a dataset.
 
-    Data split consists of a metadata file (stored as a .pickle) containing
-    labels and other parameters, and a number of `TFRecord` files with audio
-    data.
+    Data split consists of a metadata file containing labels and other
+    parameters, and a number of `TFRecord` files with audio data. Optionally,
+    it also has feature shards with pre-computed features of the same examples
+    (see `DataSplit.features`).
+
+    Metadata is read from a columnar .columns file (see `ColumnFile`) if one
+    exists, which allows labels to be loaded lazily, or from a .pickle file
+    otherwise.
 
     Attributes:
         path: Path to data split files.
@@ -16,15 +31,56 @@ class DataSplit:
         self.path = path
         self.name = name
         self._metadata = None
+        self._lock = _threading.Lock()
+        self._clean = (None, None) # (metadata, clean labels)
+
+    @property
+    def num_examples(self):
+        """Returns number of examples in the split.
+
+        Uses precomputed statistics (see `DataSplit.stats`) if available, so
+        labels are not read.
+        """
+
+        stats = self.stats
+        return stats.count if stats is not None else len(self.labels)
 
     def _get_metadata(self):
-        """Reads and caches the metadata file."""
+        """Reads and caches the metadata file.
+
+        Safe to call from multiple threads (see `prefetch_metadata`).
+        """
 
-        if self._metadata is None:
-            self._metadata = read_data(self.path + "/" + self.name + ".pickle")
-            self._metadata["files"] = [
-                self.path + "/" + file for file in self._metadata["files"]
+        if self._metadata is not None: return self._metadata
+
+        with self._lock:
+            if self._metadata is not None: return self._metadata
+
+            path = self.path + "/" + self.name
+            if file_exists(path + ".columns"):
+                metadata = read_metadata(path + ".columns")
+            else:
+                data = read_file(path + ".pickle")
+                metadata = load_data(data)
+                metadata["digest"] = _hashlib.md5(data).hexdigest()
+
+            metadata["files"] = [
+                self.path + "/" + file for file in metadata["files"]
             ]
+            metadata["checksums"] = dict(zip(
+                metadata["files"], metadata.get("checksums", [])
+            ))
+            if "sizes" in metadata: metadata["sizes"] = dict(zip(
+                metadata["files"], metadata["sizes"]
+            ))
+            if "features" in metadata:
+                features = dict(metadata["features"])
+                features["files"] = [ self.path + "/" + file for file in features["files"] ]
+                features["checksums"] = dict(zip(features["files"], features["checksums"]))
+                features["sizes"] = dict(zip(features["files"], features["sizes"]))
+                metadata["features"] = features
+            self._metadata = metadata
+
         return self._metadata
 
     @property
@@ -37,7 +93,16 @@ class DataSplit:
     def dtype(self):
         """Returns data type of audio samples."""
 
-        return self._get_metadata()["dtype"]
+        return _tf.as_dtype(self._get_metadata()["dtype"])
+
+    @property
+    def format(self):
+        """Returns format of audio data in `TFRecord` files ("float32" or "pcm16").
+
+        See `parse_serial` for details.
+        """
+
+        return self._get_metadata().get("format", "float32")
 
     @property
     def files(self):
@@ -45,16 +110,270 @@ class DataSplit:
 
         return self._get_metadata()["files"]
 
+    @property
+    def checksums(self):
+        """Returns `dict` of `TFRecord` file checksums in the form "file": "md5".
+
+        Metadata files created before checksums were introduced yield an empty
+        `dict`.
+        """
+
+        return self._get_metadata()["checksums"]
+
+    @property
+    def sizes(self):
+        """Returns `dict` of `TFRecord` file sizes in the form "file": size.
+
+        For metadata files created before sizes were introduced, sizes are
+        obtained from the files themselves (once).
+        """
+
+        metadata = self._get_metadata()
+        if "sizes" not in metadata:
+            with _ThreadPoolExecutor(max_workers=32) as pool:
+                sizes = list(pool.map(file_size, metadata["files"]))
+            metadata["sizes"] = dict(zip(metadata["files"], sizes))
+
+        return metadata["sizes"]
+
+    @property
+    def stats(self):
+        """Returns precomputed statistics of the split (see `Stats`).
+
+        Returns `None` if the metadata doesn't contain statistics.
+        """
+
+        metadata = self._get_metadata()
+        if "stats" not in metadata: return None
+
+        return Stats(metadata["stats"], metadata["sample_rate"], metadata["files"])
+
     @property
     def labels(self):
-        """Returns `dict` of labels in the form "uuid": "label"."""
+        """Returns `dict` of labels in the form "uuid": "label".
+
+        If metadata is stored in columnar format, returns a read-only mapping
+        (see `ColumnMapping`) instead.
+        """
 
         return self._get_metadata()["labels"]
 
-    def get_recordset(self, num_parallel_reads=AUTOTUNE):
-        """Returns recordset for this split (see `DataSplit.recordset`)."""
+    @property
+    def digest(self):
+        """Returns MD5 hex digest of the metadata file (or `None` if unknown)."""
+
+        return self._get_metadata().get("digest")
+
+    def get_clean_labels(self, workers=1):
+        """Returns `dict` of clean labels (see `DataSplit.clean_labels`).
+
+        Args:
+            workers: Number of worker processes to clean labels with (see
+                `clean_many`). Defaults to cleaning them in the current
+                process.
+        """
+
+        return self._get_clean(workers)["labels"]
+
+    def _get_clean(self, workers=1):
+        """Cleans labels and caches them along with alphabet and max length.
+
+        Results are cached in memory until the metadata changes, and on disk
+        (see `cache_path`) under the metadata digest, so that other processes
+        using the same version of the split can reuse them.
+        """
+
+        metadata, clean = self._clean
+        if metadata is self._get_metadata(): return clean
+
+        metadata = self._get_metadata()
+        path = cache_path(metadata["digest"] + ".clean.columns") if metadata.get("digest") else None
+
+        if path is not None and _os.path.exists(path):
+            file = ColumnFile(path)
+            clean = dict(file.attrs, labels=ColumnMapping(file, "uuid", "label"))
+
+        else:
+            labels = clean_many(metadata["labels"], workers)
+            values = labels.values()
+            clean = {
+                "labels": labels,
+                "alphabet": sorted(set("".join(values))),
+                "max_label_length": max(map(len, values), default=0),
+            }
+            if path is not None: _write_clean(path, clean)
+
+        self._clean = (metadata, clean)
+        return clean
+
+    @property
+    def clean_labels(self):
+        """Returns `dict` of clean labels in the form "uuid": "clean label".
+
+        Labels are cleaned using `clean_many` and cached, in memory and on disk,
+        until the metadata changes.
+        """
+
+        return self._get_clean()["labels"]
+
+    @property
+    def alphabet(self):
+        """Returns sorted `list` of characters used in clean labels."""
+
+        return self._get_clean()["alphabet"]
+
+    @property
+    def max_label_length(self):
+        """Returns length of the longest clean label."""
+
+        return self._get_clean()["max_label_length"]
+
+    @property
+    def lengths(self):
+        """Returns `dict` of audio lengths (in samples) in the form "uuid": length.
+
+        Returns `None` if the metadata doesn't contain audio lengths.
+        """
+
+        return self._get_metadata().get("lengths")
+
+    @property
+    def index(self):
+        """Returns mapping of record locations in the form "uuid": (shard, offset, size).
+
+        Shard is index of the `TFRecord` file in `DataSplit.files`, offset is
+        position of the record in the file and size is its size (including
+        `TFRecord` framing).
+
+        Returns `None` if the metadata doesn't contain the index.
+        """
+
+        return self._get_metadata().get("index")
+
+    def get_example(self, uuid, parse=True):
+        """Reads single example by uuid (see `DataSplit.get_examples`)."""
+
+        return self.get_examples([ uuid ], parse=parse)[0]
+
+    def get_examples(self, uuids, parse=True):
+        """Reads examples by uuid.
+
+        Records are read directly from their location in the `TFRecord` files
+        (see `DataSplit.index`) using ranged reads. Records in the same file are
+        read together and different files are read in parallel.
+
+        Args:
+            uuids: A list of uuids.
+            parse: Whether to parse examples (see `parse_serial`).
+
+        Returns:
+            A `list` of (uuid, audio) tuples, or serialized instances of
+            `Example` if `parse` is `False`, in the order of `uuids`.
+
+        Raises:
+            ValueError: If the metadata doesn't contain the index.
+            KeyError: If any of the uuids is not in the split.
+        """
+
+        index = self._get_index()
+        records = fetch_records(self.files, [ index[uuid] for uuid in uuids ])
+        if not parse: return records
+
+        format = self.format
+        return [ parse_serial(record, format) for record in records ]
+
+    def subset(self, uuids=None, predicate=None, num_parallel_reads=AUTOTUNE):
+        """Returns recordset containing only the selected examples.
+
+        Examples are selected either by a list of uuids or by a predicate on
+        their metadata, so no audio is read or parsed for the examples that are
+        left out. Records are read directly from their location in the
+        `TFRecord` files (see `DataSplit.index`), and files containing no
+        selected examples are skipped.
+
+        NB: Records are read by Python generators, which hold the GIL, and the
+        recordset can't be checkpointed (see `get_subset_recordset`). It suits
+        evaluation and inspection of small subsets better than long training
+        runs.
+
+        Example:
+
+        # clips under 10 seconds
+        ds = train.subset(predicate=lambda uuid, label, length: length < 10 * train.sample_rate)
+
+        Args:
+            uuids: A list of uuids to select. Uuids that are not in the split
+                are ignored.
+            predicate: A function called with (uuid, label, length) of each
+                example, returning whether to select it. Length is `None` if
+                the metadata doesn't contain audio lengths.
+            num_parallel_reads: Number of files to read in parallel.
+
+        Returns:
+            An instance of `tf.data.Dataset` containing serialized instances of
+            `Example`.
+
+        Raises:
+            ValueError: If the metadata doesn't contain the index.
+        """
+
+        return get_subset_recordset(self.files, self._select(uuids, predicate), num_parallel_reads)
+
+    def _select(self, uuids, predicate):
+        """Returns locations of the selected examples (see `DataSplit.subset`)."""
+
+        if (uuids is None) == (predicate is None):
+            raise ValueError("Exactly one of uuids and predicate must be given")
+
+        index = self._get_index()
+        if predicate is None: return [ index[uuid] for uuid in uuids if uuid in index ]
 
-        return get_recordset(self.files, num_parallel_reads)
+        lengths = self.lengths
+        return [ index[uuid] for uuid, label in self.labels.items()
+            if predicate(uuid, label, lengths[uuid] if lengths is not None else None)
+        ]
+
+    def _get_index(self):
+        index = self.index
+        if index is None: raise ValueError(
+            "Metadata of '{}' split doesn't contain the index".format(self.name)
+        )
+        return index
+
+    def get_recordset(self, num_parallel_reads=AUTOTUNE, cache=None, seed=None,
+            epoch=0, deterministic=None, num_shards=None, shard_index=None):
+        """Returns recordset for this split (see `DataSplit.recordset`).
+
+        Recordset created with a `seed` reads records in reproducible order and
+        its iterator can be checkpointed to resume reading after a restart (see
+        `open_speech.util.get_recordset`).
+
+        With `num_shards`, files are divided into shards of about the same
+        total size (see `shard_files`), so each worker reads a balanced,
+        disjoint part of the data.
+
+        Args:
+            num_parallel_reads: Number of files to read in parallel.
+            cache: An instance of `ShardCache` to read files through, or `None`
+                to read them directly.
+            seed: Seed to shuffle files with, or `None` to shuffle them randomly
+                on each iteration.
+            epoch: Epoch number, used along with `seed` to shuffle files.
+            deterministic: Whether to read records in deterministic order
+                (defaults to `True` if `seed` is given).
+            num_shards: Number of shards to split files into (eg, number of
+                workers in data-parallel training), or `None` to read all files.
+            shard_index: Index of the shard to read (eg, worker index).
+        """
+
+        files = self.files
+        if num_shards is not None or shard_index is not None:
+            files = shard_files(files, self.sizes, num_shards, shard_index)
+
+        return get_recordset(files, num_parallel_reads,
+            cache=cache, checksums=self.checksums,
+            seed=seed, epoch=epoch, deterministic=deterministic
+        )
 
     @property
     def recordset(self):
@@ -79,4 +398,161 @@ class DataSplit:
             An instance of `tf.data.TFRecordDataset`.
         """
 
-        return self.get_dataset()
+        return self.get_recordset()
+
+    @property
+    def features(self):
+        """Returns parameters of the feature shards.
+
+        Feature shards contain pre-computed log-mel spectrograms or MFCCs of
+        the examples, one feature shard per `TFRecord` file, written by
+        `open_speech.build` with --features. Parameters are a `dict` in the
+        form { "type": "log-mel" or "mfcc", "dtype": "float16" or "int8",
+        "depth": number of features per frame, "frame_length", "frame_step",
+        "fft_length", "num_mel_bins", "num_mfccs", "lower_edge_hertz",
+        "upper_edge_hertz" } (see `open_speech.build.compute_features`).
+
+        Returns `None` if the split doesn't have feature shards.
+        """
+
+        features = self._get_metadata().get("features")
+        if features is None: return None
+
+        return { name: value for name, value in features.items()
+            if name not in [ "files", "checksums", "sizes" ]
+        }
+
+    def get_features_recordset(self, num_parallel_reads=AUTOTUNE, cache=None,
+            seed=None, epoch=0, deterministic=None, num_shards=None, shard_index=None):
+        """Returns recordset of the feature shards (see `DataSplit.features_recordset`).
+
+        Takes the same arguments as `DataSplit.get_recordset`.
+
+        Raises:
+            ValueError: If the split doesn't have feature shards.
+        """
+
+        features = self._get_metadata().get("features")
+        if features is None: raise ValueError(
+            "Metadata of '{}' split doesn't contain features".format(self.name)
+        )
+
+        files = features["files"]
+        if num_shards is not None or shard_index is not None:
+            files = shard_files(files, features["sizes"], num_shards, shard_index)
+
+        return get_recordset(files, num_parallel_reads,
+            cache=cache, checksums=features["checksums"],
+            seed=seed, epoch=epoch, deterministic=deterministic
+        )
+
+    @property
+    def features_recordset(self):
+        """Returns recordset of the feature shards.
+
+        Recordset contains uuids and pre-computed features in serialized form.
+        Use `parse_features` with the parameters of the split to extract
+        (uuid, features) tuples.
+
+        Example:
+
+        features = train.features
+        table = lookup_table(train.labels)
+
+        ds = train.features_recordset
+        ds = ds.map(lambda example: parse_features(example, features["depth"], features["dtype"]))
+        ds = ds.map(lambda uuid, features: (features, table.lookup(uuid))) # (uuid, features) -> (features, label)
+
+        Returns:
+            An instance of `tf.data.TFRecordDataset`.
+        """
+
+        return self.get_features_recordset()
+
+    def get_dataset(self, batch_size, num_parallel_reads=AUTOTUNE, ragged=False,
+            drop_remainder=False, **kwargs):
+        """Returns batched and parsed dataset for this split.
+
+        Examples are batched before parsing, which is much faster than mapping
+        `parse_serial` over the recordset (see `parse_batch`).
+
+        Example:
+
+        table = lookup_table(train.labels)
+
+        ds = train.get_dataset(batch_size=32) # (uuid, audio, length)
+        ds = ds.map(lambda uuid, audio, length: (audio, length, table.lookup(uuid)))
+
+        Args:
+            batch_size: Number of examples in each batch.
+            num_parallel_reads: Number of files to read in parallel.
+            ragged: Whether to return audio as `tf.RaggedTensor` instead of
+                padded audio and lengths.
+            drop_remainder: Whether to drop the last batch if it has fewer than
+                `batch_size` examples.
+            **kwargs: Passed through to `DataSplit.get_recordset` (eg, `cache`).
+
+        Returns:
+            An instance of `tf.data.Dataset` containing (uuid, audio, length)
+            tuples, or (uuid, audio) tuples if `ragged` is `True`.
+        """
+
+        recordset = self.get_recordset(num_parallel_reads, **kwargs)
+        return batch_recordset(recordset, batch_size, self.format,
+            ragged=ragged, drop_remainder=drop_remainder
+        )
+
+    def get_bucketed_dataset(self, batch_size, num_buckets=8,
+            num_parallel_reads=AUTOTUNE, drop_remainder=False, **kwargs):
+        """Returns parsed dataset for this split batched by audio length.
+
+        Examples of similar length are batched together, which greatly reduces
+        amount of padding. Bucket boundaries are computed from audio lengths
+        stored in the metadata (see `DataSplit.lengths`), so that each bucket
+        receives about the same number of examples.
+
+        Args:
+            batch_size: Number of examples in each batch.
+            num_buckets: Number of length buckets.
+            num_parallel_reads: Number of files to read in parallel.
+            drop_remainder: Whether to drop the last batch of each bucket if it
+                has fewer than `batch_size` examples.
+            **kwargs: Passed through to `DataSplit.get_recordset` (eg, `cache`).
+
+        Returns:
+            An instance of `tf.data.Dataset` containing (uuid, audio, length)
+            tuples.
+
+        Raises:
+            ValueError: If the metadata doesn't contain audio lengths.
+        """
+
+        lengths = self.lengths
+        if lengths is None: raise ValueError(
+            "Metadata of '{}' split doesn't contain audio lengths".format(self.name)
+        )
+
+        recordset = self.get_recordset(num_parallel_reads, **kwargs)
+        return bucket_recordset(recordset, batch_size,
+            bucket_boundaries(lengths.values(), num_buckets), self.format,
+            drop_remainder=drop_remainder
+        )
+
+def _write_clean(path, clean):
+    """Writes clean labels into the local cache (ignoring errors)."""
+
+    temp = None
+    try:
+        _os.makedirs(_os.path.dirname(path), exist_ok=True)
+        fd, temp = _tempfile.mkstemp(dir=_os.path.dirname(path), suffix=".tmp")
+        _os.close(fd)
+
+        labels = clean["labels"]
+        attrs = { name: clean[name] for name in [ "alphabet", "max_label_length" ] }
+        write_columns(temp, attrs=attrs, columns={
+            "uuid": list(labels.keys()), "label": list(labels.values())
+        })
+        _os.replace(temp, path)
+
+    except OSError:
+        if temp is not None and _os.path.exists(temp): _os.remove(temp)
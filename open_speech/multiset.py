@@ -1,4 +1,5 @@
 from .multisplit import MultiSplit
+from .stats import Stats
 from .util import *
 
 class MultiSet:
@@ -22,6 +23,10 @@ class MultiSet:
     And, recordsets can be accessed using `train_recordset`, `valid_recordset`,
     `test_recordset` properties.
 
+    To mix datasets with custom weights instead of in proportion to their
+    number of files, pass `weights` (one per dataset) to `get_train_recordset`
+    and friends (see `MultiSplit.get_recordset`).
+
     Attributes:
         train: Training data split.
         valid: Validation data split.
@@ -35,9 +40,34 @@ class MultiSet:
         self.test  = MultiSplit([ ds.test  for ds in datasets ], "test" )
         self.valid = MultiSplit([ ds.valid for ds in datasets ], "valid")
 
+        self._labels = MergedMapping(lambda: [
+            self.train.labels, self.test.labels, self.valid.labels
+        ])
+        self._clean_labels = MergedMapping(lambda: [
+            self.train.clean_labels, self.test.clean_labels, self.valid.clean_labels
+        ])
+
     def __iter__(self):
         for dataset in self._datasets: yield dataset
 
+    def prefetch_metadata(self, wait=True):
+        """Reads metadata of all data splits in the collection concurrently.
+
+        Metadata is otherwise read lazily, one split at a time, on first access
+        to any of the split properties. Prefetching it in parallel makes the
+        startup cost that of the slowest split.
+
+        Args:
+            wait: Whether to wait for the metadata to be read. If `False`,
+                metadata is read in the background.
+
+        Returns:
+            A `list` of `concurrent.futures.Future` (one per split).
+        """
+
+        splits = [ split for ds in self._datasets for split in [ ds.train, ds.test, ds.valid ] ]
+        return prefetch_metadata(splits, wait=wait)
+
     @property
     def sample_rate(self):
         """Returns audio sample rate."""
@@ -56,12 +86,32 @@ class MultiSet:
         assert dtype == self.valid.dtype
         return dtype
 
+    @property
+    def format(self):
+        """Returns format of audio data in `TFRecord` files (see `parse_serial`).
+
+        Returns `None` if the splits use different formats.
+        """
+
+        format = self.train.format
+        return format if format == self.test.format == self.valid.format else None
+
     @property
     def files(self):
         """Returns list of all `TFRecord` files comprising the collection."""
 
         return self.train.files + self.test.files + self.valid.files
 
+    @property
+    def stats(self):
+        """Returns precomputed statistics of all splits in the collection (see `Stats`).
+
+        Returns `None` if metadata of any of the splits doesn't contain
+        statistics.
+        """
+
+        return Stats.merge([ self.train.stats, self.test.stats, self.valid.stats ])
+
     @property
     def train_labels(self):
         """Returns `dict` of training labels in the form "uuid": "label"."""
@@ -82,14 +132,47 @@ class MultiSet:
 
     @property
     def labels(self):
-        """Returns `dict` of all collection labels in the form "uuid": "label"."""
+        """Returns read-only mapping of all collection labels in the form "uuid": "label".
+
+        The mapping is a view of the split labels (see `MergedMapping`), which
+        doesn't copy them.
+        """
+
+        return self._labels
+
+    @property
+    def clean_labels(self):
+        """Returns read-only mapping of all clean labels in the collection.
+
+        Labels are cleaned using `clean_many` once per version of the metadata
+        and cached on disk (see `DataSplit.clean_labels`).
+        """
 
-        return { **self.train_labels, **self.test_labels, **self.valid_labels }
+        return self._clean_labels
 
-    def get_train_recordset(self, num_parallel_reads=AUTOTUNE):
-        """Returns training split recordset (see `MultiSet.train_recordset`)."""
+    @property
+    def alphabet(self):
+        """Returns sorted `list` of characters used in clean labels."""
 
-        return self.train.get_recordset(num_parallel_reads)
+        splits = [ self.train, self.test, self.valid ]
+        return sorted(set(char for split in splits for char in split.alphabet))
+
+    @property
+    def max_label_length(self):
+        """Returns length of the longest clean label."""
+
+        return max(self.train.max_label_length, self.test.max_label_length,
+            self.valid.max_label_length
+        )
+
+    def get_train_recordset(self, num_parallel_reads=AUTOTUNE, **kwargs):
+        """Returns training split recordset (see `MultiSet.train_recordset`).
+
+        Additional keyword arguments (eg, `cache` or `seed`) are passed through to
+        `get_recordset` of the split.
+        """
+
+        return self.train.get_recordset(num_parallel_reads, **kwargs)
 
     @property
     def train_recordset(self):
@@ -115,9 +198,14 @@ class MultiSet:
 
         return self.get_train_recordset()
 
-    def get_valid_recordset(self, num_parallel_reads=AUTOTUNE):
-        """Returns validation split recordset (see `MultiSet.valid_recordset`)."""
-        return self.valid.get_recordset(num_parallel_reads)
+    def get_valid_recordset(self, num_parallel_reads=AUTOTUNE, **kwargs):
+        """Returns validation split recordset (see `MultiSet.valid_recordset`).
+
+        Additional keyword arguments (eg, `cache` or `seed`) are passed through to
+        `get_recordset` of the split.
+        """
+
+        return self.valid.get_recordset(num_parallel_reads, **kwargs)
 
     @property
     def valid_recordset(self):
@@ -143,9 +231,14 @@ class MultiSet:
 
         return self.get_valid_recordset()
 
-    def get_test_recordset(self, num_parallel_reads=AUTOTUNE):
-        """Returns test split recordset (see `MultiSet.test_recordset`)."""
-        return self.test.get_recordset(num_parallel_reads)
+    def get_test_recordset(self, num_parallel_reads=AUTOTUNE, **kwargs):
+        """Returns test split recordset (see `MultiSet.test_recordset`).
+
+        Additional keyword arguments (eg, `cache` or `seed`) are passed through to
+        `get_recordset` of the split.
+        """
+
+        return self.test.get_recordset(num_parallel_reads, **kwargs)
 
     @property
     def test_recordset(self):
@@ -170,3 +263,27 @@ class MultiSet:
         """
 
         return self.get_test_recordset()
+
+    def get_train_dataset(self, batch_size, **kwargs):
+        """Returns batched and parsed training split dataset.
+
+        See `DataSplit.get_dataset` for details.
+        """
+
+        return self.train.get_dataset(batch_size, **kwargs)
+
+    def get_valid_dataset(self, batch_size, **kwargs):
+        """Returns batched and parsed validation split dataset.
+
+        See `DataSplit.get_dataset` for details.
+        """
+
+        return self.valid.get_dataset(batch_size, **kwargs)
+
+    def get_test_dataset(self, batch_size, **kwargs):
+        """Returns batched and parsed test split dataset.
+
+        See `DataSplit.get_dataset` for details.
+        """
+
+        return self.test.get_dataset(batch_size, **kwargs)
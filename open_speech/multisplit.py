@@ -1,4 +1,5 @@
 from .datasplit import DataSplit
+from .stats import Stats
 from .util import *
 
 class MultiSplit:
@@ -15,6 +16,16 @@ class MultiSplit:
         self._splits = splits
         self.name = name
 
+        self._labels = MergedMapping(lambda: [ split.labels for split in self._splits ])
+        self._lengths = MergedMapping(lambda: [ split.lengths for split in self._splits ])
+        self._clean_labels = MergedMapping(lambda: [ split.clean_labels for split in self._splits ])
+
+    @property
+    def num_examples(self):
+        """Returns number of examples in the split."""
+
+        return sum(split.num_examples for split in self._splits)
+
     @property
     def sample_rate(self):
         """Returns audio sample rate."""
@@ -31,22 +42,191 @@ class MultiSplit:
         assert all([ dtype == split.dtype for split in self._splits ])
         return dtype
 
+    @property
+    def format(self):
+        """Returns format of audio data in `TFRecord` files.
+
+        Returns `None` if the splits use different formats, in which case
+        `parse_serial` will detect format of each example.
+        """
+
+        format = self._splits[0].format
+        return format if all([ format == split.format for split in self._splits ]) else None
+
     @property
     def files(self):
         """Returns list of `TFRecord` files comprising the split."""
 
         return [ file for split in self._splits for file in split.files ]
 
+    @property
+    def checksums(self):
+        """Returns `dict` of `TFRecord` file checksums in the form "file": "md5"."""
+
+        return { file: md5 for split in self._splits for file, md5 in split.checksums.items() }
+
+    @property
+    def sizes(self):
+        """Returns `dict` of `TFRecord` file sizes in the form "file": size."""
+
+        return { file: size for split in self._splits for file, size in split.sizes.items() }
+
+    @property
+    def stats(self):
+        """Returns precomputed statistics of the split (see `Stats`).
+
+        Returns `None` if metadata of any of the splits doesn't contain
+        statistics.
+        """
+
+        return Stats.merge([ split.stats for split in self._splits ])
+
     @property
     def labels(self):
-        """Returns `dict` of labels in the form "uuid": "label"."""
+        """Returns read-only mapping of labels in the form "uuid": "label".
 
-        return { uuid: text for split in self._splits for uuid, text in split.labels.items() }
+        The mapping is a view of the split labels (see `MergedMapping`), which
+        doesn't copy them.
+        """
 
-    def get_recordset(self, num_parallel_reads=AUTOTUNE):
-        """Returns recordset for this split (see `MultiSplit.recordset`)."""
+        return self._labels
 
-        return get_recordset(self.files, num_parallel_reads)
+    @property
+    def clean_labels(self):
+        """Returns read-only mapping of clean labels (see `DataSplit.clean_labels`)."""
+
+        return self._clean_labels
+
+    @property
+    def alphabet(self):
+        """Returns sorted `list` of characters used in clean labels."""
+
+        return sorted(set(char for split in self._splits for char in split.alphabet))
+
+    @property
+    def max_label_length(self):
+        """Returns length of the longest clean label."""
+
+        return max(split.max_label_length for split in self._splits)
+
+    @property
+    def lengths(self):
+        """Returns read-only mapping of audio lengths in the form "uuid": length.
+
+        Returns `None` if metadata of any of the splits doesn't contain audio
+        lengths.
+        """
+
+        if any([ split.lengths is None for split in self._splits ]): return None
+        return self._lengths
+
+    def get_example(self, uuid, parse=True):
+        """Reads single example by uuid (see `DataSplit.get_examples`)."""
+
+        return self.get_examples([ uuid ], parse=parse)[0]
+
+    def get_examples(self, uuids, parse=True):
+        """Reads examples by uuid (see `DataSplit.get_examples`).
+
+        Raises:
+            KeyError: If any of the uuids is not in any of the splits.
+        """
+
+        groups = [ [] for _ in self._splits ]
+        for n, uuid in enumerate(uuids):
+            for split, group in zip(self._splits, groups):
+                if uuid in split.labels:
+                    group.append(n)
+                    break
+            else: raise KeyError(uuid)
+
+        examples = [ None ] * len(uuids)
+        for split, group in zip(self._splits, groups):
+            if not group: continue
+
+            records = split.get_examples([ uuids[n] for n in group ], parse=parse)
+            for n, record in zip(group, records): examples[n] = record
+
+        return examples
+
+    def subset(self, uuids=None, predicate=None, num_parallel_reads=AUTOTUNE):
+        """Returns recordset containing only the selected examples (see `DataSplit.subset`).
+
+        NB: Records are read by Python generators, which hold the GIL, and the
+        recordset can't be checkpointed (see `get_subset_recordset`).
+        """
+
+        locations, start = [], 0
+        for split in self._splits:
+            locations += [ (start + shard, offset, size)
+                for shard, offset, size in split._select(uuids, predicate)
+            ]
+            start += len(split.files)
+
+        return get_subset_recordset(self.files, locations, num_parallel_reads)
+
+    def get_recordset(self, num_parallel_reads=AUTOTUNE, cache=None, seed=None,
+            epoch=0, deterministic=None, num_shards=None, shard_index=None,
+            weights=None):
+        """Returns recordset for this split (see `MultiSplit.recordset`).
+
+        By default, files of all splits are shuffled together, so the mix of
+        datasets is determined by the number of files in each. If `weights` are
+        given, each split gets its own recordset instead, and examples are
+        sampled from them with the given weights (see `mix_recordsets`). This
+        allows smaller datasets to be oversampled, eg:
+
+        # sample common_voice, voxforge and librispeech equally
+        ds = open_speech.datasets.train.get_recordset(weights=[ 1, 1, 1 ])
+
+        NB: Weighted recordset is infinite.
+
+        Recordset created with a `seed` reads records in reproducible order and
+        its iterator can be checkpointed to resume reading after a restart (see
+        `open_speech.util.get_recordset`).
+
+        With `num_shards`, files are divided into shards of about the same
+        total size (see `shard_files`), so each worker reads a balanced,
+        disjoint part of the data. If `weights` are given, files of each split
+        are divided separately.
+
+        Args:
+            num_parallel_reads: Number of files to read in parallel. If
+                `weights` are given, can be a list with a separate value for
+                each split.
+            cache: An instance of `ShardCache` to read files through, or `None`
+                to read them directly.
+            seed: Seed to shuffle files with, or `None` to shuffle them randomly
+                on each iteration.
+            epoch: Epoch number, used along with `seed` to shuffle files.
+            deterministic: Whether to read records in deterministic order
+                (defaults to `True` if `seed` is given).
+            num_shards: Number of shards to split files into (eg, number of
+                workers in data-parallel training), or `None` to read all files.
+            shard_index: Index of the shard to read (eg, worker index).
+            weights: A list of sampling weights (one per split), or `None` to
+                shuffle files of all splits together.
+        """
+
+        if weights is not None:
+            if not isinstance(num_parallel_reads, (list, tuple)):
+                num_parallel_reads = [ num_parallel_reads ] * len(self._splits)
+
+            recordsets = [ split.get_recordset(split_reads, cache=cache,
+                    seed=seed, epoch=epoch, deterministic=deterministic,
+                    num_shards=num_shards, shard_index=shard_index
+                ) for split, split_reads in zip(self._splits, num_parallel_reads)
+            ]
+            return mix_recordsets(recordsets, weights, seed=seed)
+
+        files = self.files
+        if num_shards is not None or shard_index is not None:
+            files = shard_files(files, self.sizes, num_shards, shard_index)
+
+        return get_recordset(files, num_parallel_reads,
+            cache=cache, checksums=self.checksums,
+            seed=seed, epoch=epoch, deterministic=deterministic
+        )
 
     @property
     def recordset(self):
@@ -72,3 +252,72 @@ class MultiSplit:
         """
 
         return self.get_recordset()
+
+    def get_dataset(self, batch_size, num_parallel_reads=AUTOTUNE, ragged=False,
+            drop_remainder=False, **kwargs):
+        """Returns batched and parsed dataset for this split.
+
+        Examples are batched before parsing, which is much faster than mapping
+        `parse_serial` over the recordset (see `parse_batch`).
+
+        Example:
+
+        table = lookup_table(train.labels)
+
+        ds = train.get_dataset(batch_size=32) # (uuid, audio, length)
+        ds = ds.map(lambda uuid, audio, length: (audio, length, table.lookup(uuid)))
+
+        Args:
+            batch_size: Number of examples in each batch.
+            num_parallel_reads: Number of files to read in parallel.
+            ragged: Whether to return audio as `tf.RaggedTensor` instead of
+                padded audio and lengths.
+            drop_remainder: Whether to drop the last batch if it has fewer than
+                `batch_size` examples.
+            **kwargs: Passed through to `MultiSplit.get_recordset` (eg, `cache`).
+
+        Returns:
+            An instance of `tf.data.Dataset` containing (uuid, audio, length)
+            tuples, or (uuid, audio) tuples if `ragged` is `True`.
+        """
+
+        recordset = self.get_recordset(num_parallel_reads, **kwargs)
+        return batch_recordset(recordset, batch_size, self.format,
+            ragged=ragged, drop_remainder=drop_remainder
+        )
+
+    def get_bucketed_dataset(self, batch_size, num_buckets=8,
+            num_parallel_reads=AUTOTUNE, drop_remainder=False, **kwargs):
+        """Returns parsed dataset for this split batched by audio length.
+
+        Examples of similar length are batched together, which greatly reduces
+        amount of padding. Bucket boundaries are computed from audio lengths
+        stored in the metadata (see `MultiSplit.lengths`), so that each bucket
+        receives about the same number of examples.
+
+        Args:
+            batch_size: Number of examples in each batch.
+            num_buckets: Number of length buckets.
+            num_parallel_reads: Number of files to read in parallel.
+            drop_remainder: Whether to drop the last batch of each bucket if it
+                has fewer than `batch_size` examples.
+            **kwargs: Passed through to `MultiSplit.get_recordset` (eg, `cache`).
+
+        Returns:
+            An instance of `tf.data.Dataset` containing (uuid, audio, length)
+            tuples.
+
+        Raises:
+            ValueError: If the metadata doesn't contain audio lengths.
+        """
+
+        lengths = self.lengths
+        if lengths is None: raise ValueError(
+            "Metadata of '{}' split doesn't contain audio lengths".format(self.name)
+        )
+
+        recordset = self.get_recordset(num_parallel_reads, **kwargs)
+        return bucket_recordset(recordset, batch_size,
+            bucket_boundaries(lengths.values(), num_buckets), self.format,
+            drop_remainder=drop_remainder
+        )
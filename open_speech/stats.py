@@ -0,0 +1,172 @@
+from bisect import bisect_left as _bisect_left
+
+# bin sizes of the length histograms
+_length_bin = 4000 # 0.25s @ 16kHz
+_label_bin = 1 # 1 character
+
+class Stats:
+    """Precomputed statistics of a data split (or several of them).
+
+    Statistics are computed when the dataset is created and stored in the split
+    metadata (see `make_stats`), so they are available instantly without
+    reading any audio or labels.
+
+    Usage example:
+
+    stats = open_speech.datasets.train.stats
+    print(len(stats), "examples,", stats.hours, "hours")
+    print("95th percentile:", stats.percentile(95) / stats.sample_rate, "s")
+    print("steps per epoch:", stats.steps_per_epoch(batch_size=32))
+
+    Attributes:
+        sample_rate: Audio sample rate.
+    """
+
+    def __init__(self, data, sample_rate, files=None):
+        self._data = data
+        self.sample_rate = sample_rate
+
+        # map shard statistics to file paths
+        if files is not None: self._data = dict(data, shards={
+            file: (count, samples) for file, count, samples in zip(
+                files, data["shards"]["counts"], data["shards"]["samples"]
+            )
+        })
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def count(self):
+        """Returns number of examples."""
+
+        return self._data["count"]
+
+    @property
+    def samples(self):
+        """Returns total number of audio samples."""
+
+        return self._data["samples"]
+
+    @property
+    def hours(self):
+        """Returns total audio duration in hours."""
+
+        return self.samples / self.sample_rate / 3600
+
+    @property
+    def shards(self):
+        """Returns `dict` of per-file statistics in the form "file": (count, samples)."""
+
+        return self._data["shards"]
+
+    @property
+    def histogram(self):
+        """Returns histogram of audio lengths.
+
+        Returns:
+            A `tuple` (bin_size, counts), where `counts[n]` is the number of
+            examples with length (in samples) in `[n * bin_size, (n+1) * bin_size)`.
+        """
+
+        histogram = self._data["histogram"]
+        return histogram["bin_size"], histogram["counts"]
+
+    @property
+    def label_histogram(self):
+        """Returns histogram of label lengths (in characters, see `histogram`)."""
+
+        histogram = self._data["label_histogram"]
+        return histogram["bin_size"], histogram["counts"]
+
+    def percentile(self, q):
+        """Returns approximate `q`-th percentile of audio lengths (in samples).
+
+        The result is the upper edge of the histogram bin containing the
+        percentile.
+        """
+
+        return _percentile(*self.histogram, q)
+
+    def label_percentile(self, q):
+        """Returns approximate `q`-th percentile of label lengths."""
+
+        return _percentile(*self.label_histogram, q)
+
+    def steps_per_epoch(self, batch_size, drop_remainder=False):
+        """Returns number of batches in one epoch."""
+
+        steps, remainder = divmod(self.count, batch_size)
+        return steps + (1 if remainder and not drop_remainder else 0)
+
+    @staticmethod
+    def merge(stats):
+        """Merges statistics of several data splits.
+
+        Args:
+            stats: A list of `Stats` instances.
+
+        Returns:
+            An instance of `Stats`, or `None` if any of `stats` is `None`.
+        """
+
+        if any([ each is None for each in stats ]): return None
+
+        sample_rate = stats[0].sample_rate
+        assert all([ sample_rate == each.sample_rate for each in stats ])
+
+        return Stats({
+            "count": sum(each.count for each in stats),
+            "samples": sum(each.samples for each in stats),
+            "shards": { file: shard for each in stats for file, shard in each.shards.items() },
+            "histogram": _merge_histograms([ each._data["histogram"] for each in stats ]),
+            "label_histogram": _merge_histograms([ each._data["label_histogram"] for each in stats ]),
+        }, sample_rate)
+
+def make_stats(shard_lengths, labels):
+    """Computes statistics of a data split to be stored in its metadata.
+
+    Args:
+        shard_lengths: A list of lists of audio lengths (in samples), one list
+            per `TFRecord` file in the order of the "files" metadata entry.
+        labels: A list of labels.
+
+    Returns:
+        A `dict` of statistics (see `Stats`).
+    """
+
+    lengths = [ length for shard in shard_lengths for length in shard ]
+    return {
+        "count": len(lengths),
+        "samples": sum(lengths),
+        "shards": {
+            "counts": [ len(shard) for shard in shard_lengths ],
+            "samples": [ sum(shard) for shard in shard_lengths ],
+        },
+        "histogram": _histogram(lengths, _length_bin),
+        "label_histogram": _histogram(map(len, labels), _label_bin),
+    }
+
+def _histogram(values, bin_size):
+    counts = []
+    for value in values:
+        index = value // bin_size
+        if index >= len(counts): counts += [ 0 ] * (index + 1 - len(counts))
+        counts[index] += 1
+    return { "bin_size": bin_size, "counts": counts }
+
+def _merge_histograms(histograms):
+    bin_size = histograms[0]["bin_size"]
+    assert all([ bin_size == histogram["bin_size"] for histogram in histograms ])
+
+    counts = [ 0 ] * max(len(histogram["counts"]) for histogram in histograms)
+    for histogram in histograms:
+        for index, count in enumerate(histogram["counts"]): counts[index] += count
+    return { "bin_size": bin_size, "counts": counts }
+
+def _percentile(bin_size, counts, q):
+    total, cumulative = sum(counts), []
+    for count in counts: cumulative.append((cumulative[-1] if cumulative else 0) + count)
+
+    index = _bisect_left(cumulative, total * q / 100)
+    return (index + 1) * bin_size
@@ -0,0 +1,145 @@
+from collections.abc import Mapping as _Mapping
+
+from .util import _LazyModule, _tf
+
+_np = _LazyModule("numpy")
+
+class TokenTable:
+    """Translation table to replace uuids with integer-encoded labels.
+
+    All labels are tokenized at once when the table is created and stored as a
+    flat array of token ids plus row offsets, so no string processing happens
+    in the input pipeline.
+
+    Usage example:
+
+    table = token_table(open_speech.clean_labels)
+
+    ds = open_speech.train_recordset
+    ds = ds.map(parse_serial) # serial -> (uuid, audio)
+    ds = ds.map(lambda uuid, audio: (audio, table.lookup(uuid))) # (uuid, audio) -> (audio, tokens)
+
+    Attributes:
+        vocabulary: A `list` of tokens; token id is the index in this list.
+    """
+
+    def __init__(self, labels, vocabulary=None):
+        uuids, values, offsets, self.vocabulary = encode_labels(labels, vocabulary)
+
+        # unknown uuids are mapped to an extra empty row at the end
+        keys, rows = uuids, _np.arange(len(uuids), dtype=_np.int64)
+
+        # StaticHashTable can't be empty, so without labels any uuid maps to
+        # the empty row
+        if not uuids: keys, rows = [ "" ], _np.zeros(1, dtype=_np.int64)
+
+        self._index = _tf.lookup.StaticHashTable(
+            initializer=_tf.lookup.KeyValueTensorInitializer(
+                keys=_tf.constant(keys, dtype=_tf.string), values=rows
+            ),
+            default_value=len(uuids)
+        )
+        self._tokens = _tf.RaggedTensor.from_row_splits(
+            values=values, row_splits=_np.append(offsets, offsets[-1])
+        )
+
+    def lookup(self, uuids):
+        """Looks up token ids of labels by uuid.
+
+        Args:
+            uuids: A `tf.string` scalar or 1-D tensor of uuids.
+
+        Returns:
+            A 1-D `tf.int32` tensor of token ids for a scalar uuid, or a
+            `tf.RaggedTensor` of token ids for a 1-D tensor of uuids. Unknown
+            uuids yield no tokens.
+        """
+
+        uuids = _tf.convert_to_tensor(uuids, dtype=_tf.string)
+        return _tf.gather(self._tokens, self._index.lookup(uuids))
+
+def token_table(labels, vocabulary=None):
+    """Creates translation table to replace uuids with integer-encoded labels.
+
+    Args:
+        labels: A mapping in the form "uuid": "label".
+        vocabulary: A list of tokens (see `encode_labels`).
+
+    Returns:
+        An instance of `TokenTable`.
+    """
+
+    return TokenTable(labels, vocabulary)
+
+def encode_labels(labels, vocabulary=None):
+    """Tokenizes labels and encodes them as token ids.
+
+    If all tokens in the vocabulary are single characters, all labels are
+    encoded at once using vectorized operations. Otherwise, each label is
+    tokenized by greedily matching the longest token, which is much slower.
+
+    Characters not matching any token are dropped.
+
+    Args:
+        labels: A mapping in the form "uuid": "label".
+        vocabulary: A list of tokens. Defaults to sorted list of all characters
+            used in the labels.
+
+    Returns:
+        A `tuple` (uuids: `list`, values: `np.int32` array, offsets: `np.int64`
+        array, vocabulary: `list`), where token ids of i-th label are
+        `values[offsets[i] : offsets[i + 1]]`.
+    """
+
+    if not isinstance(labels, _Mapping): raise TypeError("labels must be a mapping")
+
+    uuids, texts = list(labels.keys()), list(labels.values())
+    if vocabulary is None: vocabulary = sorted(set("".join(texts)))
+    vocabulary = list(vocabulary)
+
+    if all(len(token) == 1 for token in vocabulary):
+        values, offsets = _encode_chars(texts, vocabulary)
+    else: values, offsets = _encode_tokens(texts, vocabulary)
+
+    return uuids, values, offsets, vocabulary
+
+def _encode_chars(texts, vocabulary):
+    """Encodes labels using vocabulary of single characters."""
+
+    lengths = _np.fromiter(map(len, texts), dtype=_np.int64, count=len(texts))
+    offsets = _np.concatenate([ [ 0 ], _np.cumsum(lengths) ])
+
+    # code points of all labels joined together
+    codes = _np.frombuffer("".join(texts).encode("utf-32-le"), dtype=_np.uint32)
+
+    vocab = _np.array([ ord(token) for token in vocabulary ] or [ 0xffffffff ], dtype=_np.uint32)
+    order = _np.argsort(vocab)
+    index = _np.searchsorted(vocab[order], codes).clip(0, len(vocab) - 1)
+
+    found = vocab[order][index] == codes
+    values = order[index][found].astype(_np.int32)
+
+    # adjust offsets for dropped characters
+    kept = _np.concatenate([ [ 0 ], _np.cumsum(found) ])
+    return values, kept[offsets].astype(_np.int64)
+
+def _encode_tokens(texts, vocabulary):
+    """Encodes labels using vocabulary of multi-character tokens."""
+
+    ids = { token: id for id, token in enumerate(vocabulary) }
+    max_len = max(map(len, vocabulary), default=0)
+
+    values, offsets = [], [ 0 ]
+    for text in texts:
+        start = 0
+        while start < len(text):
+            for end in range(min(len(text), start + max_len), start, -1):
+                if text[start:end] in ids:
+                    values.append(ids[text[start:end]])
+                    start = end
+                    break
+            else: start += 1 # drop unknown character
+
+        offsets.append(len(values))
+
+    return _np.array(values, dtype=_np.int32), _np.array(offsets, dtype=_np.int64)
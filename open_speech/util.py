@@ -1,13 +1,316 @@
-from io import BytesIO as _BytesIO
-from pickle import load as _load
+import heapq as _heapq
+import importlib as _importlib
+import io as _io
+import pickle as _pickle
+import os as _os
+import random as _random
+import re as _re
+import struct as _struct
+
+from collections.abc import Mapping as _Mapping
+from collections.abc import ItemsView as _ItemsView, ValuesView as _ValuesView
+from concurrent.futures import ProcessPoolExecutor as _ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor as _ThreadPoolExecutor
 from unidecode import unidecode as _unidecode
+from urllib.error import HTTPError as _HTTPError
+from urllib.parse import quote as _quote
+from urllib.request import Request as _Request, urlopen as _urlopen
+
+class _LazyModule:
+    """Imports module on first attribute access."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, name):
+        return getattr(_importlib.import_module(self._name), name)
+
+# TensorFlow takes several seconds to import, so it is only imported once it
+# is actually used (eg, to create a recordset)
+_tf = _LazyModule("tensorflow")
+
+AUTOTUNE = -1 # same as tf.data.experimental.AUTOTUNE
+
+class MergedMapping(_Mapping):
+    """Read-only view of several mappings merged together.
+
+    The mappings are obtained by calling `get_maps` on each access, so the view
+    is never copied and always reflects the current state of the underlying
+    mappings. Keys are expected to be unique across the mappings (eg, uuids).
+
+    Args:
+        get_maps: A callable returning a `list` of mappings to merge.
+    """
+
+    def __init__(self, get_maps):
+        self._get_maps = get_maps
+
+    @property
+    def maps(self):
+        """Returns `list` of the underlying mappings."""
+
+        return self._get_maps()
+
+    def __getitem__(self, key):
+        for map in self.maps:
+            try: return map[key]
+            except KeyError: pass
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return any(key in map for map in self.maps)
+
+    def __len__(self):
+        return sum(len(map) for map in self.maps)
+
+    def __iter__(self):
+        for map in self.maps: yield from map
+
+    def values(self):
+        return _MergedValues(self)
+
+    def items(self):
+        return _MergedItems(self)
+
+class _MergedValues(_ValuesView):
+    def __iter__(self):
+        for map in self._mapping.maps: yield from map.values()
+
+class _MergedItems(_ItemsView):
+    def __iter__(self):
+        for map in self._mapping.maps: yield from map.items()
+
+def read_file(path, offset=0, size=None):
+    """Reads contents of a file (or a part of it).
+
+    Local files and public files in Google Cloud Storage are read without
+    importing TensorFlow. Other files (eg, in private buckets, or all GCS files
+    if `$OPEN_SPEECH_HTTP` is set to 0) are read using `tf.io.gfile`.
+
+    Args:
+        path: Path to the file (eg, "/tmp/train.pickle" or "gs://bucket/file").
+        offset: Position in the file to start reading from.
+        size: Number of bytes to read (or `None` to read until the end).
+
+    Returns:
+        File contents as `bytes`.
+    """
+
+    if size == 0: return b""
+
+    if "://" not in path:
+        with open(path, "rb") as file:
+            file.seek(offset)
+            return file.read(-1 if size is None else size)
+
+    if _use_http(path):
+        end = "" if size is None else str(offset + size - 1)
+        try: return _http_get(path, { "Range": "bytes={}-{}".format(offset, end) })
+        except _HTTPError as e:
+            if e.code == 404: raise FileNotFoundError(path)
+            if e.code == 416: return b"" # offset is past the end of the file
+            if e.code not in [ 401, 403 ]: raise
+
+    with _tf.io.gfile.GFile(path, "rb") as file:
+        file.seek(offset)
+        return file.read(-1 if size is None else size)
+
+def file_exists(path):
+    """Checks whether file exists (see `read_file`)."""
+
+    if "://" not in path:
+        return _os.path.exists(path)
+
+    if _use_http(path):
+        try: return _http_get(path, method="HEAD") is not None
+        except _HTTPError as e:
+            if e.code == 404: return False
+            if e.code not in [ 401, 403 ]: raise
+
+    return _tf.io.gfile.exists(path)
+
+def file_size(path):
+    """Returns size of a file in bytes (see `read_file`)."""
+
+    if "://" not in path:
+        return _os.path.getsize(path)
+
+    if _use_http(path):
+        url = "https://storage.googleapis.com/" + _quote(path[len("gs://"):])
+        try:
+            with _urlopen(_Request(url, method="HEAD")) as response:
+                return int(response.headers["Content-Length"])
+        except _HTTPError as e:
+            if e.code == 404: raise FileNotFoundError(path)
+            if e.code not in [ 401, 403 ]: raise
+
+    return _tf.io.gfile.stat(path).length
+
+def _use_http(path):
+    """Checks whether to read file via public HTTPS endpoint of GCS.
+
+    Files in GCS are read over HTTPS (falling back to `tf.io.gfile` for
+    private files) unless `$OPEN_SPEECH_HTTP` is set to 0, in which case they
+    are always read using `tf.io.gfile` and its credentials.
+    """
+
+    return path.startswith("gs://") and _os.environ.get("OPEN_SPEECH_HTTP", "1") not in [ "", "0" ]
+
+def _http_get(path, headers={}, method="GET"):
+    """Reads file from Google Cloud Storage via its public HTTPS endpoint."""
+
+    url = "https://storage.googleapis.com/" + _quote(path[len("gs://"):])
+    with _urlopen(_Request(url, headers=headers, method=method)) as response:
+        return response.read()
+
+def read_records(path, ranges, max_gap=1024 ** 2):
+    """Reads `TFRecord` records at the given byte ranges of a file.
+
+    Ranges that are close to each other are coalesced and read at once (see
+    `iter_records`).
+
+    Args:
+        path: Path to the `TFRecord` file.
+        ranges: A list of (offset, size) tuples, where offset is position of the
+            record in the file and size is its size including framing.
+        max_gap: Maximum number of bytes between two ranges to coalesce them.
+
+    Returns:
+        A `list` of records (serialized instances of `Example`) in the order of
+        `ranges`.
+    """
+
+    records = [ None ] * len(ranges)
+    for n, record in iter_records(path, ranges, max_gap): records[n] = record
+    return records
+
+def iter_records(path, ranges, max_gap=1024 ** 2, max_block=16 * 1024 ** 2):
+    """Iterates over `TFRecord` records at the given byte ranges of a file.
+
+    Records are read in the order of their position in the file. Ranges that are
+    less than `max_gap` bytes apart are coalesced into blocks of up to
+    `max_block` bytes, and each block is read at once.
+
+    Args:
+        path: Path to the `TFRecord` file.
+        ranges: A list of (offset, size) tuples (see `read_records`).
+        max_gap: Maximum number of bytes between two ranges to coalesce them.
+        max_block: Maximum size of a coalesced block.
+
+    Yields:
+        (n, record) tuples, where n is index of the record in `ranges`.
+    """
+
+    order = sorted(range(len(ranges)), key=lambda n: ranges[n][0])
+
+    # group ranges into [ start, end, [ indices ] ] blocks
+    blocks = []
+    for n in order:
+        offset, size = ranges[n]
+        if blocks and offset - blocks[-1][1] <= max_gap and offset + size - blocks[-1][0] <= max_block:
+            blocks[-1][1] = max(blocks[-1][1], offset + size)
+            blocks[-1][2].append(n)
+        else: blocks.append([ offset, offset + size, [ n ] ])
+
+    for start, end, indices in blocks:
+        data = read_file(path, start, end - start)
+        for n in indices:
+            offset, size = ranges[n]
+            yield n, _unframe(data[offset - start : offset - start + size])
 
-import tensorflow as _tf
+def fetch_records(files, locations, max_workers=32):
+    """Reads `TFRecord` records at the given locations.
 
-AUTOTUNE = _tf.data.experimental.AUTOTUNE
+    Records in the same file are read together (see `read_records`), and
+    different files are read in parallel.
+
+    Args:
+        files: A list of `TFRecord` files.
+        locations: A list of (shard, offset, size) tuples, where shard is index
+            of the file in `files` (see `DataSplit.index`).
+        max_workers: Maximum number of files to read in parallel.
+
+    Returns:
+        A `list` of records in the order of `locations`.
+    """
+
+    shards = {}
+    for n, (shard, offset, size) in enumerate(locations):
+        shards.setdefault(shard, []).append((n, offset, size))
+
+    records = [ None ] * len(locations)
+    def read(shard):
+        entries = shards[shard]
+        ranges = [ (offset, size) for _, offset, size in entries ]
+        for (n, _, _), record in zip(entries, read_records(files[shard], ranges)):
+            records[n] = record
+
+    with _ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shards)))) as pool:
+        list(pool.map(read, shards.keys()))
+
+    return records
+
+def get_subset_recordset(files, locations, num_parallel_reads):
+    """Creates recordset of records at the given locations.
+
+    Only the files containing any of the records are read, and only the parts
+    of them containing the records (see `iter_records`).
+
+    NB: Ranged reads have no TensorFlow op, so records are read by Python
+    generators (see `tf.data.Dataset.from_generator`). They hold the GIL while
+    reading, so the input pipeline runs mostly in one thread, and iterators of
+    the recordset can't be saved with `tf.train.Checkpoint`. For long training
+    runs that need to resume, filter the full recordset instead, eg:
+
+    table = lookup_table({ uuid: True for uuid in uuids }, default_value=False)
+    ds = split.recordset.filter(lambda example: table.lookup(parse_serial(example)[0]))
+
+    Args:
+        files: A list of `TFRecord` files.
+        locations: A list of (shard, offset, size) tuples (see `fetch_records`).
+        num_parallel_reads: Number of files to read in parallel.
+
+    Returns:
+        An instance of `tf.data.Dataset` containing serialized instances of
+        `Example`.
+    """
+
+    shards = {}
+    for shard, offset, size in locations:
+        shards.setdefault(shard, []).append((offset, size))
+
+    def read(shard):
+        shard = int(shard)
+        for _, record in iter_records(files[shard], shards[shard]): yield record
+
+    # shards with no selected records are not read at all
+    shard_dataset = _tf.data.Dataset.from_tensor_slices(
+        _tf.constant(list(shards.keys()), dtype=_tf.int64)
+    )
+    shard_dataset = shard_dataset.shuffle(
+        buffer_size=max(len(shards), 1), reshuffle_each_iteration=True
+    )
+    return shard_dataset.interleave(
+        lambda shard: _tf.data.Dataset.from_generator(read, args=(shard,),
+            output_signature=_tf.TensorSpec(shape=[], dtype=_tf.string)
+        ),
+        cycle_length=num_parallel_reads, num_parallel_calls=num_parallel_reads,
+        deterministic=False
+    )
+
+def _unframe(data):
+    """Extracts record data from `TFRecord` framing.
+
+    Each record is stored as: length (uint64), masked CRC32C of length (uint32),
+    data, masked CRC32C of data (uint32). CRCs are not verified.
+    """
+
+    length = _struct.unpack("<Q", data[:8])[0]
+    if length + 16 != len(data): raise IOError("Corrupt TFRecord record")
+    return bytes(data[12 : 12 + length])
 
 def read_data(path):
-    """Reads data from .pickle file.
+    """Reads data from .pickle file (see `load_data`).
 
     Args:
         path: Path tp .pickle file to read.
@@ -16,51 +319,451 @@ def read_data(path):
         Python object.
     """
 
-    with _BytesIO(_tf.io.read_file(path).numpy()) as file:
-        return _load(file)
+    return load_data(read_file(path))
+
+def load_data(data):
+    """Unpickles data without importing TensorFlow.
+
+    Metadata pickles store the audio dtype as `tf.DType`, which is read as its
+    name (eg, "float32") instead. Use `tf.as_dtype` to convert it back.
+    """
+
+    return _Unpickler(_io.BytesIO(data)).load()
+
+class _Unpickler(_pickle.Unpickler):
+    def find_class(self, module, name):
+        # tf.DType is pickled as a call to as_dtype(name)
+        if module.startswith("tensorflow") and name == "as_dtype": return str
+        return super().find_class(module, name)
+
+def cache_path(name):
+    """Returns path of a file in the local cache directory.
+
+    The cache directory is `$OPEN_SPEECH_CACHE` if set, or "open_speech" in
+    `$XDG_CACHE_HOME` (defaults to "~/.cache").
+
+    Args:
+        name: Name of the file.
+
+    Returns:
+        Path to the file.
+    """
+
+    path = _os.environ.get("OPEN_SPEECH_CACHE") or _os.path.join(
+        _os.environ.get("XDG_CACHE_HOME") or _os.path.expanduser("~/.cache"), "open_speech"
+    )
+    return _os.path.join(path, name)
+
+def prefetch_metadata(splits, wait=True, max_workers=None):
+    """Reads metadata of data splits concurrently.
+
+    Args:
+        splits: A list of `DataSplit` instances.
+        wait: Whether to wait for the metadata to be read. If `False`, metadata
+            is read in the background.
+        max_workers: Maximum number of threads to use (defaults to one thread
+            per split).
+
+    Returns:
+        A `list` of `concurrent.futures.Future` (one per split).
+    """
+
+    if not splits: return []
+
+    pool = _ThreadPoolExecutor(max_workers=max_workers or len(splits))
+    futures = [ pool.submit(split._get_metadata) for split in splits ]
+    pool.shutdown(wait=wait)
+
+    if wait:
+        for future in futures: future.result() # re-raise errors
+    return futures
+
+def shard_files(files, sizes, num_shards, shard_index):
+    """Splits list of files into balanced disjoint shards by total byte size.
+
+    Files are assigned greedily, largest first, to the shard with the smallest
+    total size so far. The assignment only depends on the files and their
+    sizes, so each worker can compute its own shard independently.
+
+    Args:
+        files: A list of files.
+        sizes: A `dict` of file sizes in the form "file": size.
+        num_shards: Number of shards (eg, number of workers).
+        shard_index: Index of the shard to return.
+
+    Returns:
+        A `list` of files in the shard (in their original order).
+
+    Raises:
+        ValueError: If only one of `num_shards` and `shard_index` is given, or
+            they are out of range.
+    """
 
-def get_recordset(files, num_parallel_reads):
+    if num_shards is None or shard_index is None: raise ValueError(
+        "num_shards and shard_index must be given together"
+    )
+    if not 0 <= shard_index < num_shards: raise ValueError(
+        "Invalid shard index {} for {} shards".format(shard_index, num_shards)
+    )
+    if num_shards > len(files): raise ValueError(
+        "Can't split {} files into {} shards".format(len(files), num_shards)
+    )
+
+    shards = [ (0, index) for index in range(num_shards) ] # (size, index)
+    chosen = set()
+    for file in sorted(files, key=lambda file: (-sizes[file], file)):
+        size, index = _heapq.heappop(shards)
+        if index == shard_index: chosen.add(file)
+        _heapq.heappush(shards, (size + sizes[file], index))
+
+    return [ file for file in files if file in chosen ]
+
+def get_recordset(files, num_parallel_reads, cache=None, checksums=None,
+        seed=None, epoch=0, deterministic=None):
     """Creates dataset from a list of `TFRecord` files.
 
+    By default, files are reshuffled on each iteration and records are read in
+    non-deterministic order, which is fastest.
+
+    If `seed` is given, files are read in the order given by `shuffle_files`
+    for the specified `epoch`, and records are read in deterministic order. A
+    preempted job can then resume where it stopped by re-creating recordset
+    with the same seed and epoch, and restoring its iterator from a checkpoint.
+    The checkpoint stores record offset within each file that is being read, so
+    the files are not re-read from the start:
+
+    ds = get_recordset(files, AUTOTUNE, seed=42, epoch=epoch)
+    iterator = iter(ds)
+
+    checkpoint = tf.train.Checkpoint(iterator=iterator, epoch=tf.Variable(epoch))
+    checkpoint.restore(tf.train.latest_checkpoint(checkpoint_dir)) # on restart
+    ...
+    checkpoint.save(checkpoint_dir + "/ckpt") # periodically
+
     Args:
         files: A list of `TFRecord` files to read from.
         num_parallel_reads: Number of files to read in parallel.
+        cache: An instance of `ShardCache` to copy files into before reading
+            them, or `None` to read files directly.
+        checksums: A `dict` in the form "file": "md5" used to verify cached
+            copies of the files.
+        seed: Seed to shuffle files with, or `None` to shuffle them randomly.
+        epoch: Epoch number, used along with `seed` to shuffle files.
+        deterministic: Whether to read records in deterministic order (defaults
+            to `True` if `seed` is given and `False` otherwise).
 
     Returns:
         An instance of `tf.data.TFRecordDataset`.
     """
 
-    file_dataset = _tf.data.Dataset.from_tensor_slices(files)
-    file_dataset = file_dataset.shuffle(buffer_size=len(files),
-        reshuffle_each_iteration=True
+    if seed is None:
+        file_dataset = _tf.data.Dataset.from_tensor_slices(files)
+        file_dataset = file_dataset.shuffle(buffer_size=len(files),
+            reshuffle_each_iteration=True
+        )
+    else: file_dataset = _tf.data.Dataset.from_tensor_slices(
+        shuffle_files(files, seed, epoch)
     )
+
+    if cache is not None:
+        file_dataset = file_dataset.map(
+            lambda file: _cached_file(file, cache, checksums or {}),
+            num_parallel_calls=AUTOTUNE
+        )
     recordset = _tf.data.TFRecordDataset(file_dataset,
         num_parallel_reads=num_parallel_reads
     )
     options = _tf.data.Options()
-    options.experimental_deterministic = False
+    options.deterministic = (seed is not None) if deterministic is None else deterministic
+    if cache is not None:
+        # the cache doesn't change the data, so iterators can be checkpointed
+        options.experimental_external_state_policy = \
+            _tf.data.experimental.ExternalStatePolicy.IGNORE
 
     return recordset.with_options(options)
 
-def parse_serial(example):
+def mix_recordsets(recordsets, weights, seed=None):
+    """Mixes recordsets by sampling from them with the given weights.
+
+    Each recordset is repeated indefinitely, so smaller recordsets can be
+    oversampled without duplicating their files, and the result is an infinite
+    recordset (use `take` or `steps_per_epoch` to define an epoch).
+
+    Args:
+        recordsets: A list of recordsets.
+        weights: A list of relative sampling weights (one per recordset).
+        seed: Seed to sample with, or `None` to sample randomly.
+
+    Returns:
+        An instance of `tf.data.Dataset`.
+    """
+
+    if len(weights) != len(recordsets): raise ValueError(
+        "Expected {} weights, got {}".format(len(recordsets), len(weights))
+    )
+
+    total = float(sum(weights))
+    return _tf.data.experimental.sample_from_datasets(
+        [ recordset.repeat() for recordset in recordsets ],
+        weights=[ weight / total for weight in weights ], seed=seed
+    )
+
+def shuffle_files(files, seed, epoch=0):
+    """Shuffles list of files deterministically.
+
+    Args:
+        files: A list of files.
+        seed: Seed to shuffle files with.
+        epoch: Epoch number; each epoch gets a different order.
+
+    Returns:
+        A shuffled `list` of files.
+    """
+
+    files = list(files)
+    _random.Random("{}:{}".format(seed, epoch)).shuffle(files)
+    return files
+
+def _cached_file(file, cache, checksums):
+    """Fetches file into the cache and returns path of the local copy."""
+
+    def fetch(file):
+        file = file.decode("utf-8")
+        return cache.fetch(file, checksums.get(file)).encode("utf-8")
+
+    path = _tf.numpy_function(fetch, [file], _tf.string)
+    return _tf.reshape(path, [])
+
+def parse_serial(example, format=None):
     """Parses serialized `Example` and extracts audio and uuid.
 
+    Audio can be stored in one of two formats:
+
+    - "float32": audio samples as a list of floats (original format);
+    - "pcm16": raw 16-bit little-endian PCM data, which is half the size.
+
+    Format of each split is recorded in its metadata (see `DataSplit.format`).
+    If `format` is `None`, it is detected for each example, which is slightly
+    slower but works for recordsets mixing both formats.
+
     Args:
         example: Single serialized instance of `Example`.
+        format: Audio format of the example ("float32", "pcm16" or `None`).
 
     Returns:
         A `tuple` (uuid: `tf.string`, audio: [`tf.float32`]) extracted from the
         example.
     """
 
+    data = _tf.io.parse_single_example(serialized=example,
+        features=_audio_features(format)
+    )
+    uuid = data["uuid"]
+
+    if format == "float32":
+        audio = _tf.sparse.to_dense(data["audio"])
+
+    elif format == "pcm16":
+        audio = _decode_pcm(data["pcm"])
+
+    else: audio = _tf.concat([ # one of them is empty
+        _tf.sparse.to_dense(data["audio"]), _decode_pcm(data["pcm"])
+    ], axis=0)
+
+    return uuid, audio
+
+def parse_batch(examples, format=None, ragged=False):
+    """Parses a batch of serialized `Example`s and extracts audio and uuids.
+
+    This is a batched version of `parse_serial`, which parses all examples
+    with a single call to `tf.io.parse_example`. It is much faster than
+    mapping `parse_serial` over individual examples, eg:
+
+    ds = open_speech.train_recordset
+    ds = ds.batch(32).map(parse_batch) # serial -> (uuid, audio, length)
+
+    Args:
+        examples: A batch (1-D tensor) of serialized instances of `Example`.
+        format: Audio format of the examples ("float32", "pcm16" or `None`). See
+            `parse_serial` for details.
+        ragged: Whether to return audio as `tf.RaggedTensor`.
+
+    Returns:
+        A `tuple` (uuid: [`tf.string`], audio: [[`tf.float32`]], length:
+        [`tf.int64`]), where audio is zero-padded to the longest example in the
+        batch and length is the number of samples in each example.
+
+        Or, if `ragged` is `True`, a `tuple` (uuid: [`tf.string`], audio:
+        `tf.RaggedTensor`).
+    """
+
+    data = _tf.io.parse_example(serialized=examples,
+        features=_audio_features(format, batch=True)
+    )
+    uuid = data["uuid"]
+
+    if format == "float32":
+        audio = data["audio"]
+
+    elif format == "pcm16":
+        audio = _decode_pcm_batch(data["pcm"])
+
+    else: audio = _tf.concat([ # one of them is empty for each example
+        data["audio"], _decode_pcm_batch(data["pcm"])
+    ], axis=1)
+
+    if ragged: return uuid, audio
+    return uuid, audio.to_tensor(), audio.row_lengths()
+
+def batch_recordset(recordset, batch_size, format=None, ragged=False,
+        drop_remainder=False):
+    """Batches and parses recordset (see `parse_batch`).
+
+    Args:
+        recordset: Recordset containing serialized instances of `Example`.
+        batch_size: Number of examples in each batch.
+        format: Audio format of the examples (see `parse_serial`).
+        ragged: Whether to return audio as `tf.RaggedTensor`.
+        drop_remainder: Whether to drop the last batch if it has fewer than
+            `batch_size` examples.
+
+    Returns:
+        An instance of `tf.data.Dataset` (see `parse_batch` for its elements).
+    """
+
+    dataset = recordset.batch(batch_size, drop_remainder=drop_remainder)
+    return dataset.map(lambda examples: parse_batch(examples, format, ragged),
+        num_parallel_calls=AUTOTUNE
+    )
+
+def bucket_recordset(recordset, batch_size, bucket_boundaries, format=None,
+        drop_remainder=False):
+    """Parses recordset and batches examples of similar length together.
+
+    Examples are grouped into buckets by the number of audio samples and each
+    batch is padded to the longest example in its bucket (see
+    `tf.data.experimental.bucket_by_sequence_length`).
+
+    Args:
+        recordset: Recordset containing serialized instances of `Example`.
+        batch_size: Number of examples in each batch.
+        bucket_boundaries: Upper length boundaries of the buckets (see
+            `bucket_boundaries`).
+        format: Audio format of the examples (see `parse_serial`).
+        drop_remainder: Whether to drop the last batch of each bucket if it
+            has fewer than `batch_size` examples.
+
+    Returns:
+        An instance of `tf.data.Dataset` containing (uuid, audio, length) tuples
+        (see `parse_batch`).
+    """
+
+    def parse(example):
+        uuid, audio = parse_serial(example, format)
+        return uuid, audio, _tf.shape(audio, out_type=_tf.int64)[0]
+
+    dataset = recordset.map(parse, num_parallel_calls=AUTOTUNE)
+    return dataset.apply(_tf.data.experimental.bucket_by_sequence_length(
+        element_length_func=lambda uuid, audio, length: _tf.cast(length, _tf.int32),
+        bucket_boundaries=bucket_boundaries,
+        bucket_batch_sizes=[ batch_size ] * (len(bucket_boundaries) + 1),
+        drop_remainder=drop_remainder,
+    ))
+
+def bucket_boundaries(lengths, num_buckets):
+    """Computes bucket boundaries from a list of audio lengths.
+
+    Boundaries are chosen at quantiles of the length distribution, so that
+    each bucket receives about the same number of examples.
+
+    Args:
+        lengths: A list of audio lengths (in samples).
+        num_buckets: Number of buckets.
+
+    Returns:
+        A sorted `list` of at most `num_buckets - 1` boundaries (empty if
+        there are no lengths).
+    """
+
+    lengths = sorted(lengths)
+    if not lengths: return []
+
+    return sorted(set(
+        lengths[len(lengths) * n // num_buckets] for n in range(1, num_buckets)
+    ))
+
+def parse_features(example, depth, dtype="float16"):
+    """Parses serialized `Example` from a feature shard.
+
+    Feature shards contain pre-computed log-mel spectrograms or MFCCs of the
+    examples (see `DataSplit.features`), stored either as "float16" or as
+    "int8" with per-example scale and offset.
+
+    Example:
+
+    features = train.features # parameters of the feature shards
+
+    ds = train.features_recordset
+    ds = ds.map(lambda example: parse_features(example, features["depth"], features["dtype"]))
+
+    Args:
+        example: Single serialized instance of `Example`.
+        depth: Number of features per frame (eg, number of mel bins).
+        dtype: Data type of stored features ("float16" or "int8").
+
+    Returns:
+        A `tuple` (uuid: `tf.string`, features: [[`tf.float32`]]) with features
+        of shape [frames, depth].
+    """
+
+    if dtype not in [ "float16", "int8" ]:
+        raise ValueError("Unknown feature dtype: {}".format(dtype))
+
     data = _tf.io.parse_single_example(serialized=example, features={
         "uuid": _tf.io.FixedLenFeature([], _tf.string),
-        "audio": _tf.io.VarLenFeature(_tf.float32),
+        "features": _tf.io.FixedLenFeature([], _tf.string),
+        "scale": _tf.io.FixedLenFeature([], _tf.float32, default_value=1.0),
+        "offset": _tf.io.FixedLenFeature([], _tf.float32, default_value=0.0),
     })
-    uuid = data["uuid"]
-    audio = _tf.sparse.to_dense(data["audio"])
 
-    return uuid, audio
+    if dtype == "float16":
+        values = _tf.io.decode_raw(data["features"], _tf.float16, little_endian=True)
+        values = _tf.cast(values, _tf.float32)
+
+    else:
+        values = _tf.cast(_tf.io.decode_raw(data["features"], _tf.int8), _tf.float32)
+        values = (values + 128.0) * data["scale"] + data["offset"]
+
+    return data["uuid"], _tf.reshape(values, [ -1, depth ])
+
+def _audio_features(format, batch=False):
+    """Returns feature spec to parse examples in the given audio format."""
+
+    if format not in [ None, "float32", "pcm16" ]:
+        raise ValueError("Unknown audio format: {}".format(format))
+
+    features = { "uuid": _tf.io.FixedLenFeature([], _tf.string) }
+    if format != "pcm16":
+        features["audio"] = _tf.io.RaggedFeature(_tf.float32, row_splits_dtype=_tf.int64) \
+            if batch else _tf.io.VarLenFeature(_tf.float32)
+    if format != "float32":
+        features["pcm"] = _tf.io.FixedLenFeature([], _tf.string, default_value="")
+    return features
+
+def _decode_pcm(pcm):
+    """Converts raw 16-bit PCM data into float32 samples in [-1.0, 1.0)."""
+
+    audio = _tf.io.decode_raw(pcm, _tf.int16, little_endian=True)
+    return _tf.cast(audio, _tf.float32) / 32768.0
+
+def _decode_pcm_batch(pcm):
+    """Converts a batch of raw 16-bit PCM data into `tf.RaggedTensor`."""
+
+    # decode_raw() needs inputs of the same length, so join them together and
+    # split the samples afterwards
+    lengths = _tf.cast(_tf.strings.length(pcm), _tf.int64) // 2
+    audio = _decode_pcm(_tf.strings.reduce_join(pcm))
+    return _tf.RaggedTensor.from_row_lengths(audio, lengths)
 
 def lookup_table(labels, default_value=""):
     """Creates translation table to replace uuids with labels.
@@ -90,7 +793,8 @@ def lookup_table(labels, default_value=""):
         default_value=default_value
     )
 
-_remove_table = str.maketrans("", "", "!\"#$%&()*+,-./:;<=>?@[\\]^_`{|}~")
+_remove_chars = "!\"#$%&()*+,-./:;<=>?@[\\]^_`{|}~"
+_remove_table = str.maketrans("", "", _remove_chars)
 
 def clean(label):
     """Cleans the label by doing the following:
@@ -101,8 +805,65 @@ def clean(label):
     - Strip all punctuation except for the apostrophe (').
     """
 
-    label = _unidecode(label)
+    if not label.isascii(): label = _unidecode(label)
     label = label.strip()
     label = label.lower()
     label = label.translate(_remove_table)
     return label
+
+def clean_many(labels, workers=1, chunk_size=10000):
+    """Cleans many labels at once (see `clean`).
+
+    By default, labels are cleaned in the current process. With more
+    `workers`, they are split into chunks and cleaned in parallel in a process
+    pool, eg:
+
+    clean_labels = open_speech.clean_many(open_speech.labels, workers=8)
+
+    Args:
+        labels: A mapping in the form "uuid": "label", or a list of labels.
+        workers: Number of worker processes, or `None` to use all CPUs. If 1,
+            labels are cleaned in the current process.
+        chunk_size: Number of labels sent to a worker process at a time.
+
+    Returns:
+        A `dict` in the form "uuid": "clean label", or a `list` of clean labels.
+    """
+
+    if isinstance(labels, _Mapping):
+        return dict(zip(labels.keys(), clean_many(list(labels.values()), workers, chunk_size)))
+
+    labels = list(labels)
+    workers = workers or _os.cpu_count() or 1
+    if workers == 1 or len(labels) <= chunk_size:
+        return _clean_chunk(labels)
+
+    chunks = [ labels[n : n + chunk_size] for n in range(0, len(labels), chunk_size) ]
+    with _ProcessPoolExecutor(max_workers=workers) as pool:
+        return [ label for chunk in pool.map(_clean_chunk, chunks) for label in chunk ]
+
+def _clean_chunk(labels):
+    return [ clean(label) for label in labels ]
+
+def clean_tensor(labels):
+    """Cleans labels inside TensorFlow graph (see `clean`).
+
+    This allows labels to be cleaned as part of the input pipeline, eg:
+
+    ds = ds.map(lambda audio, label: (audio, clean_tensor(label)))
+
+    NB: Unicode characters can't be converted to their ascii equivalents
+    in-graph and are left unchanged, so the result only matches `clean` for
+    ascii labels.
+
+    Args:
+        labels: A `tf.string` tensor of any shape.
+
+    Returns:
+        A `tf.string` tensor of clean labels.
+    """
+
+    labels = _tf.strings.strip(labels)
+    labels = _tf.strings.lower(labels)
+    labels = _tf.strings.regex_replace(labels, "[" + _re.escape(_remove_chars) + "]", "")
+    return labels
@@ -13,6 +13,10 @@ setuptools.setup(name="open_speech",
     url="https://github.com/dimitry-ishenko-ml/open-speech",
     packages=setuptools.find_packages(),
     install_requires=[ "tensorflow", "unidecode" ],
+    extras_require={ "audio": [ "av" ] },
+    entry_points={
+        "console_scripts": [ "open-speech-build = open_speech.build:main" ],
+    },
     classifiers=[
         "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
         "Operating System :: OS Independent",
@@ -0,0 +1,263 @@
+import json
+import pickle
+import uuid
+import wave
+
+import numpy as np
+import pytest
+
+from open_speech import build
+
+sample_rate = 16000
+
+def write_wav(path, samples):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(sample_rate)
+        file.writeframes(samples.astype("<i2").tobytes())
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Writes a small corpus of WAV files and "train.jsonl"."""
+
+    path = tmp_path / "corpus"
+    rng = np.random.RandomState(0)
+
+    rows = []
+    for n in range(12):
+        samples = rng.randint(-3000, 3000, size=800 + 100 * n)
+        write_wav(path / "audio" / "{:02d}.wav".format(n), samples)
+        rows.append({ "path": "audio/{:02d}.wav".format(n), "audio_size": 2 * len(samples), "label": "label {}".format(n) })
+
+    write_rows(path, "train", rows)
+    return path
+
+def write_rows(path, split, rows):
+    with open(str(path / (split + ".jsonl")), "w") as file:
+        for row in rows: file.write(json.dumps(row) + "\n")
+
+def make_builder(corpus, output, **kwargs):
+    return build.Builder("test", corpus, output, max_shard_size=8000, max_workers=2, progress=False, **kwargs)
+
+def test_append_refuses_old_metadata(corpus, tmp_path):
+    output = tmp_path / "output"
+    output.mkdir()
+
+    # metadata of splits created before the builder: uuid1 ids and no index
+    metadata = { "files": [ "train-0000-of-0001.tfrec" ], "labels": { str(uuid.uuid1()): "label" } }
+    (output / "train.pickle").write_bytes(pickle.dumps(metadata))
+    with pytest.raises(ValueError, match="index"):
+        make_builder(corpus, output).build("train", append=True)
+
+    metadata.update(index={}, lengths={}, sizes=[ 0 ], checksums=[ "" ])
+    (output / "train.pickle").write_bytes(pickle.dumps(metadata))
+    with pytest.raises(ValueError, match="uuid5"):
+        make_builder(corpus, output).build("train", append=True)
+
+def read_split(output, split):
+    import tensorflow as tf
+    from open_speech.util import parse_serial
+
+    metadata = pickle.loads((output / (split + ".pickle")).read_bytes())
+    files = [ str(output / name) for name in metadata["files"] ]
+    examples = {}
+    for record in tf.data.TFRecordDataset(files):
+        uuid, audio = parse_serial(record, metadata["format"])
+        examples[uuid.numpy().decode("utf-8")] = audio.numpy()
+    return metadata, examples
+
+def shard_mtimes(output, metadata):
+    return [ (output / name).stat().st_mtime_ns for name in metadata["files"] ]
+
+def test_pack_shards():
+    sizes = [ 10, 20, 30, 5, 15, 25 ]
+    shards = pack_shards_checked(sizes, 60)
+    assert sorted(index for shard in shards for index in shard) == list(range(len(sizes)))
+
+    assert build.pack_shards([], 50) == []
+    assert build.pack_shards([ 50 ], 50) == [ [ 0 ] ]
+    assert sorted(build.pack_shards([ 60, 10 ], 50)) == [ [ 0 ], [ 1 ] ]
+
+def pack_shards_checked(sizes, max_size):
+    shards = build.pack_shards(sizes, max_size)
+    for shard in shards: assert sum(sizes[index] for index in shard) <= max_size
+    return shards
+
+@pytest.mark.parametrize("sizes", [ { "uuid": 36, "pcm": 0 }, { "uuid": 36, "pcm": 100 }, { "uuid": 36, "pcm": 200000 } ])
+def test_record_size(sizes):
+    import tensorflow as tf
+
+    features = { "uuid": b"u" * sizes["uuid"], "pcm": b"\x01" * sizes["pcm"], "audio": np.arange(50, dtype="f4") }
+    sizes["audio"] = 200
+
+    record = build.encode_example(features)
+    assert len(record) + 16 == build.record_size(sizes)
+
+    example = tf.train.Example.FromString(record).features.feature
+    assert example["uuid"].bytes_list.value == [ features["uuid"] ]
+    assert example["pcm"].bytes_list.value == [ features["pcm"] ]
+    assert list(example["audio"].float_list.value) == list(features["audio"])
+
+@pytest.mark.parametrize("format", build.formats)
+def test_build(corpus, tmp_path, format):
+    output = tmp_path / "output"
+    builder = make_builder(corpus, output, format=format)
+
+    metadata = builder.build("train")
+    assert len(metadata["files"]) > 1
+    assert metadata["sizes"] == [ (output / name).stat().st_size for name in metadata["files"] ]
+
+    _, examples = read_split(output, "train")
+    assert sorted(metadata["labels"].values()) == sorted("label {}".format(n) for n in range(12))
+    assert set(examples) == set(metadata["labels"])
+
+    for uuid, audio in examples.items():
+        n = int(metadata["labels"][uuid].split()[1])
+        with wave.open(str(corpus / "audio" / "{:02d}.wav".format(n)), "rb") as file:
+            expected = np.frombuffer(file.readframes(file.getnframes()), "<i2") / 32768
+        np.testing.assert_allclose(audio, expected)
+        assert metadata["lengths"][uuid] == len(expected)
+
+    # records are where the index says they are
+    from open_speech.util import read_records
+    for uuid, (shard, offset, size) in metadata["index"].items():
+        record = read_records(str(output / metadata["files"][shard]), [ (offset, size) ])[0]
+        assert uuid.encode("utf-8") in record
+
+def test_build_resumes(corpus, tmp_path):
+    output = tmp_path / "output"
+    metadata = make_builder(corpus, output).build("train")
+    mtimes = shard_mtimes(output, metadata)
+
+    # finished shards are skipped...
+    assert make_builder(corpus, output).build("train")["checksums"] == metadata["checksums"]
+    assert shard_mtimes(output, metadata) == mtimes
+
+    # ...and missing ones are written again
+    (output / metadata["files"][0]).unlink()
+    assert make_builder(corpus, output).build("train")["checksums"] == metadata["checksums"]
+    assert shard_mtimes(output, metadata)[1:] == mtimes[1:]
+
+def test_build_appends(corpus, tmp_path):
+    output = tmp_path / "output"
+    rows = [ json.loads(row) for row in open(str(corpus / "train.jsonl")) ]
+
+    write_rows(corpus, "train", rows[:8])
+    metadata = make_builder(corpus, output).build("train")
+    mtimes = shard_mtimes(output, metadata)
+
+    write_rows(corpus, "train", rows)
+    appended = make_builder(corpus, output).build("train", append=True)
+
+    assert appended["files"][:len(metadata["files"])] == metadata["files"]
+    assert shard_mtimes(output, metadata) == mtimes
+    assert set(appended["labels"].values()) == set(row["label"] for row in rows)
+
+    _, examples = read_split(output, "train")
+    assert set(examples) == set(appended["labels"])
+
+def test_build_skips_bad_files(corpus, tmp_path):
+    output = tmp_path / "output"
+    rows = [ json.loads(row) for row in open(str(corpus / "train.jsonl")) ]
+    rows[3]["audio_size"] += sample_rate # 0.5s longer than the file
+    write_rows(corpus, "train", rows)
+
+    metadata = make_builder(corpus, output).build("train")
+    assert sorted(metadata["labels"].values()) == sorted(row["label"] for n, row in enumerate(rows) if n != 3)
+
+    _, examples = read_split(output, "train")
+    assert set(examples) == set(metadata["labels"])
+
+    from open_speech.util import read_records
+    for uuid, (shard, offset, size) in metadata["index"].items():
+        record = read_records(str(output / metadata["files"][shard]), [ (offset, size) ])[0]
+        assert uuid.encode("utf-8") in record
+
+@pytest.fixture
+def archive(tmp_path):
+    """Writes a VoxForge-like archive with two sessions and a corrupt file."""
+
+    import tarfile
+
+    path = tmp_path / "archives"
+    source = tmp_path / "source"
+    rng = np.random.RandomState(0)
+
+    for session in [ "anonymous-1", "anonymous-2" ]:
+        for n in range(4):
+            write_wav(source / session / "wav" / "a{:04d}.wav".format(n), rng.randint(-3000, 3000, size=1000))
+        (source / session / "etc").mkdir()
+        (source / session / "etc" / "PROMPTS").write_text("".join(
+            "{}/mfc/a{:04d} {} {}\n".format(session, n, session.upper(), n) for n in range(5)
+        ))
+
+    (source / "anonymous-2" / "wav" / "a0003.wav").write_bytes(b"not audio")
+
+    path.mkdir()
+    with tarfile.open(str(path / "sessions.tgz"), "w:gz") as file:
+        for session in [ "anonymous-1", "anonymous-2" ]:
+            file.add(str(source / session), arcname=session)
+    return path
+
+def test_build_archives(archive, tmp_path, capsys):
+    output = tmp_path / "output"
+    builder = build.Builder("test", archive, output, max_shard_size=8000, max_workers=2)
+
+    metadata = builder.build_archives({ str(archive / "sessions.tgz"): "train" })["train"]
+    assert sorted(metadata["labels"].values()) == sorted(
+        "{} {}".format(session, n) for session in [ "ANONYMOUS-1", "ANONYMOUS-2" ] for n in range(4)
+    )[:-1]
+
+    out = capsys.readouterr().out
+    assert "Failed to read: anonymous-2/wav/a0003.wav" in out
+    assert "Missing file: anonymous-1/a0004" in out
+
+    _, examples = read_split(output, "train")
+    assert set(examples) == set(metadata["labels"])
+
+def test_weighted_split():
+    weights = build.corpora["voxforge"]["weights"]
+    uuids = [ str(uuid.uuid5(uuid.NAMESPACE_URL, "voxforge/{}".format(n))) for n in range(2000) ]
+
+    splits = [ build.weighted_split(uuid, weights) for uuid in uuids ]
+    assert splits == [ build.weighted_split(uuid, weights) for uuid in uuids ]
+    assert abs(splits.count("train") / len(splits) - .8) < .05
+
+def test_try_read_audio_size(archive, tmp_path):
+    path = tmp_path / "source" / "anonymous-1" / "wav" / "a0000.wav"
+    assert build.try_read_audio_size(str(path), sample_rate) == (2000, None)
+
+    path = tmp_path / "source" / "anonymous-2" / "wav" / "a0003.wav"
+    size, error = build.try_read_audio_size(str(path), sample_rate)
+    assert size is None and error.startswith("Failed to read: " + str(path))
+
+@pytest.mark.parametrize("args", [ [ "--append" ], [ "--splits", "train" ] ])
+def test_archives_options(archive, tmp_path, args):
+    with pytest.raises(SystemExit):
+        build.main([ "voxforge", str(archive), str(tmp_path / "output"), "--archives" ] + args)
+
+@pytest.mark.parametrize("archives", [ False, True ])
+def test_build_features(corpus, archive, tmp_path, archives):
+    from open_speech.datasplit import DataSplit
+    from open_speech.util import parse_features
+
+    output = tmp_path / "output"
+    builder = make_builder(archive if archives else corpus, output, features={ "dtype": "int8", "num_mel_bins": 40 })
+    metadata = builder.build_archives({ str(archive / "sessions.tgz"): "train" })["train"] if archives \
+        else builder.build("train")
+
+    split = DataSplit(str(output), "train")
+    features = split.features
+    assert features["depth"] == 40 and features["dtype"] == "int8"
+    assert len(metadata["features"]["files"]) == len(metadata["files"])
+
+    frames = {}
+    for example in split.features_recordset:
+        uuid, values = parse_features(example, features["depth"], features["dtype"])
+        frames[uuid.numpy().decode("utf-8")] = values.shape[0]
+
+    assert set(frames) == set(metadata["labels"])
+    for uuid, count in frames.items():
+        assert count == 1 + (metadata["lengths"][uuid] - features["frame_length"]) // features["frame_step"]
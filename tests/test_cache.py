@@ -0,0 +1,94 @@
+import hashlib
+import os
+
+import pytest
+
+from open_speech.cache import ShardCache
+
+def make_file(path, data):
+    path.write_bytes(data)
+    return str(path), hashlib.md5(data).hexdigest()
+
+@pytest.fixture
+def bucket(tmp_path):
+    path = tmp_path / "bucket"
+    path.mkdir()
+    return path
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "cache")
+
+def test_fetch_copies_and_hits(bucket, cache_dir):
+    file, checksum = make_file(bucket / "train-0000.tfrec", b"a" * 100)
+    cache = ShardCache(cache_dir)
+
+    path = cache.fetch(file, checksum)
+    assert open(path, "rb").read() == b"a" * 100
+
+    # a hit is read from the local copy, not the source
+    os.remove(file)
+    assert cache.fetch(file, checksum) == path
+
+def test_same_name_different_source(bucket, cache_dir):
+    (bucket / "a").mkdir()
+    (bucket / "b").mkdir()
+    file_a, _ = make_file(bucket / "a" / "train-0000.tfrec", b"a")
+    file_b, _ = make_file(bucket / "b" / "train-0000.tfrec", b"b")
+    cache = ShardCache(cache_dir)
+
+    assert cache.fetch(file_a) != cache.fetch(file_b)
+
+def test_checksum_mismatch(bucket, cache_dir):
+    file, _ = make_file(bucket / "train-0000.tfrec", b"a" * 100)
+    cache = ShardCache(cache_dir)
+
+    with pytest.raises(IOError):
+        cache.fetch(file, hashlib.md5(b"other").hexdigest())
+    assert os.listdir(cache_dir) == []
+
+def test_rebuilt_shard_is_fetched_again(bucket, cache_dir):
+    file, checksum = make_file(bucket / "train-0000.tfrec", b"old")
+    cache = ShardCache(cache_dir)
+    cache.fetch(file, checksum)
+
+    file, checksum = make_file(bucket / "train-0000.tfrec", b"new")
+    assert open(cache.fetch(file, checksum), "rb").read() == b"new"
+
+def test_lru_eviction(bucket, cache_dir):
+    files = [ make_file(bucket / "{}.tfrec".format(n), bytes([ n ]) * 100) for n in range(4) ]
+    cache = ShardCache(cache_dir, max_size=250, num_pinned=0)
+
+    paths = []
+    for n, (file, checksum) in enumerate(files[:2]):
+        paths.append(cache.fetch(file, checksum))
+        os.utime(paths[-1], (n, n))
+
+    cache.fetch(*files[0]) # hit marks 0 as recently used
+    paths.append(cache.fetch(*files[2]))
+
+    assert os.path.exists(paths[0])
+    assert not os.path.exists(paths[1]) # least recently used
+    assert os.path.exists(paths[2])
+
+def test_pinned_files_are_not_evicted(bucket, cache_dir):
+    files = [ make_file(bucket / "{}.tfrec".format(n), bytes([ n ]) * 100) for n in range(3) ]
+    cache = ShardCache(cache_dir, max_size=150, num_pinned=2)
+
+    paths = [ cache.fetch(file, checksum) for file, checksum in files ]
+
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1]) # over max_size, but pinned
+    assert os.path.exists(paths[2])
+
+def test_clear_keeps_temp_files(bucket, cache_dir):
+    file, checksum = make_file(bucket / "train-0000.tfrec", b"a")
+    cache = ShardCache(cache_dir)
+    path = cache.fetch(file, checksum)
+
+    temp = os.path.join(cache_dir, "copy.tmp")
+    open(temp, "wb").close()
+    cache.clear()
+
+    assert not os.path.exists(path)
+    assert os.path.exists(temp)
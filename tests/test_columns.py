@@ -0,0 +1,82 @@
+import pickle
+
+import pytest
+
+from open_speech.columns import ColumnFile, ColumnMapping, main, read_metadata, write_columns
+
+uuids = [ "a", "b", "c" ]
+labels = [ "über", "", "日本語 text" ]
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "train.columns")
+    write_columns(path, attrs={ "sample_rate": 16000 }, columns={
+        "uuid": uuids, "label": labels, "length": [ 1, -2, 2 ** 40 ], "empty": [ "" ] * 3,
+    })
+
+    file = ColumnFile(path)
+    assert file.count == 3
+    assert file.attrs == { "sample_rate": 16000 }
+    assert file.names == [ "uuid", "label", "length", "empty" ]
+    assert list(file.column("label")) == labels
+    assert file.column("label")[-1] == labels[-1]
+    assert file.column("label")[1:] == labels[1:]
+    assert list(file.column("length")) == [ 1, -2, 2 ** 40 ]
+    assert list(file.column("empty")) == [ "" ] * 3
+
+    with pytest.raises(IndexError):
+        file.column("label")[3]
+
+    mapping = ColumnMapping(file, "uuid", ("label", "length"))
+    assert len(mapping) == 3
+    assert list(mapping) == uuids
+    assert mapping["c"] == (labels[2], 2 ** 40)
+    assert dict(mapping.items()) == { "a": ("über", 1), "b": ("", -2), "c": (labels[2], 2 ** 40) }
+    assert "d" not in mapping
+
+def test_empty_columns(tmp_path):
+    path = str(tmp_path / "train.columns")
+    write_columns(path, { "uuid": [], "label": [] })
+
+    metadata = read_metadata(path)
+    assert len(metadata["labels"]) == 0
+    assert dict(metadata["labels"]) == {}
+
+def test_different_lengths(tmp_path):
+    with pytest.raises(ValueError):
+        write_columns(str(tmp_path / "train.columns"), { "uuid": uuids, "label": labels[:2] })
+
+@pytest.mark.parametrize("data", [ b"", b"OSCOLUMN", b"not a column file" ])
+def test_not_column_file(tmp_path, data):
+    path = tmp_path / "train.columns"
+    path.write_bytes(data)
+
+    with pytest.raises(ValueError):
+        ColumnFile(str(path))
+
+def test_convert_pickle(tmp_path):
+    import tensorflow as tf
+
+    metadata = {
+        "sample_rate": 16000, "dtype": tf.float32, "files": [ "train-0.tfrec" ],
+        "labels": dict(zip(uuids, labels)),
+        "lengths": dict(zip(uuids, [ 100, 200, 300 ])),
+        "index": dict(zip(uuids, [ (0, 0, 10), (0, 10, 20), (0, 30, 30) ])),
+    }
+    (tmp_path / "train.pickle").write_bytes(pickle.dumps(metadata))
+
+    # older metadata contains labels only
+    del metadata["lengths"], metadata["index"]
+    (tmp_path / "valid.pickle").write_bytes(pickle.dumps(metadata))
+
+    main([ str(tmp_path) ])
+
+    train = read_metadata(str(tmp_path / "train.columns"))
+    assert train["dtype"] == "float32"
+    assert train["files"] == [ "train-0.tfrec" ]
+    assert dict(train["labels"]) == dict(zip(uuids, labels))
+    assert dict(train["lengths"]) == { "a": 100, "b": 200, "c": 300 }
+    assert train["index"]["b"] == (0, 10, 20)
+
+    valid = read_metadata(str(tmp_path / "valid.columns"))
+    assert dict(valid["labels"]) == dict(zip(uuids, labels))
+    assert "lengths" not in valid and "index" not in valid
@@ -0,0 +1,206 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from open_speech.build import encode_example
+from open_speech.datasplit import DataSplit
+from open_speech.multisplit import MultiSplit
+from open_speech.stats import make_stats
+
+def write_split(path, name, labels, stats=True, shard_lengths=None, **kwargs):
+    metadata = dict({ "sample_rate": 16000, "dtype": "float32", "files": [], "labels": labels }, **kwargs)
+    if stats: metadata["stats"] = make_stats(shard_lengths or [ [ 16000 ] * len(labels) ], labels.values())
+    (path / (name + ".pickle")).write_bytes(pickle.dumps(metadata))
+
+def test_num_examples(tmp_path):
+    write_split(tmp_path, "train", { "a": "one", "b": "two" })
+    write_split(tmp_path, "valid", { "c": "three" }, stats=False)
+
+    train, valid = DataSplit(str(tmp_path), "train"), DataSplit(str(tmp_path), "valid")
+    assert train.num_examples == 2
+    assert valid.num_examples == 1
+    assert MultiSplit([ train, valid ], "train").num_examples == 3
+
+def test_stats(tmp_path):
+    write_split(tmp_path, "train", { "a": "a", "b": "bb", "c": "ccc" },
+        files=[ "train-0.tfrec", "train-1.tfrec" ], shard_lengths=[ [ 4000, 12000 ], [ 20000 ] ]
+    )
+    write_split(tmp_path, "valid", { "d": "dddd" }, files=[ "valid-0.tfrec" ], shard_lengths=[ [ 8000 ] ])
+    write_split(tmp_path, "test", { "e": "e" }, stats=False)
+
+    train, valid, test = [ DataSplit(str(tmp_path), name) for name in [ "train", "valid", "test" ] ]
+    stats = train.stats
+
+    assert len(stats) == stats.count == 3
+    assert stats.samples == 36000
+    assert stats.hours == 36000 / 16000 / 3600
+    assert stats.shards == { str(tmp_path) + "/train-0.tfrec": (2, 16000), str(tmp_path) + "/train-1.tfrec": (1, 20000) }
+    assert stats.histogram == (4000, [ 0, 1, 0, 1, 0, 1 ])
+
+    # upper edge of the bin containing the percentile
+    assert stats.percentile(50) == 16000
+    assert stats.percentile(100) == 24000
+    assert stats.label_percentile(100) == 4
+
+    assert stats.steps_per_epoch(2) == 2
+    assert stats.steps_per_epoch(2, drop_remainder=True) == 1
+    assert stats.steps_per_epoch(3, drop_remainder=True) == 1
+
+    merged = MultiSplit([ train, valid ], "train").stats
+    assert merged.count == 4
+    assert merged.samples == 44000
+    assert merged.histogram == (4000, [ 0, 1, 1, 1, 0, 1 ])
+    assert merged.label_histogram == (1, [ 0, 1, 1, 1, 1 ])
+    assert set(merged.shards) == set(stats.shards) | { str(tmp_path) + "/valid-0.tfrec" }
+
+    assert test.stats is None
+    assert MultiSplit([ train, test ], "train").stats is None
+
+def test_merged_labels_follow_metadata(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPEN_SPEECH_CACHE", str(tmp_path / "cache"))
+    write_split(tmp_path, "train", { "a": "One!" })
+    write_split(tmp_path, "valid", { "b": "Two" })
+
+    splits = [ DataSplit(str(tmp_path), name) for name in [ "train", "valid" ] ]
+    multi = MultiSplit(splits, "train")
+    labels, clean_labels = multi.labels, multi.clean_labels
+    assert dict(labels) == { "a": "One!", "b": "Two" }
+    assert dict(clean_labels) == { "a": "one", "b": "two" }
+    assert multi.labels is labels # not merged again on each access
+
+    # re-read metadata of a rebuilt split
+    write_split(tmp_path, "train", { "a": "One!", "c": "Three?" })
+    splits[0]._metadata = None
+    assert len(labels) == 3
+    assert dict(labels) == { "a": "One!", "c": "Three?", "b": "Two" }
+    assert dict(clean_labels) == { "a": "one", "c": "three", "b": "two" }
+
+def test_truth_does_not_read_metadata(tmp_path):
+    split = DataSplit(str(tmp_path), "missing")
+    assert split
+    assert split._metadata is None
+
+def test_metadata_without_tensorflow(tmp_path):
+    import subprocess
+    import sys
+    import tensorflow as tf
+
+    metadata = { "sample_rate": 16000, "dtype": tf.float32, "files": [], "labels": { "a": "one" } }
+    (tmp_path / "train.pickle").write_bytes(pickle.dumps(metadata))
+
+    code = "import sys; from open_speech.datasplit import DataSplit; " \
+        "split = DataSplit({!r}, 'train'); " \
+        "assert split.labels == {{ 'a': 'one' }}; assert 'tensorflow' not in sys.modules; " \
+        "assert split.dtype.name == 'float32'".format(str(tmp_path))
+    subprocess.run([ sys.executable, "-c", code ], check=True)
+
+def write_shard(path, name, samples, format, prefix=""):
+    """Writes examples with uuids prefix + "0", "1", ...
+
+    Returns:
+        A `tuple` (labels, index) in the form of split metadata.
+    """
+
+    import tensorflow as tf
+
+    labels, index, offset = {}, {}, 0
+    with tf.io.TFRecordWriter(str(path / name)) as writer:
+        for n, pcm in enumerate(samples):
+            uuid = prefix + str(n)
+            audio = { "pcm": pcm.tobytes() } if format == "pcm16" else { "audio": pcm.astype("<f4") / 32768 }
+            record = encode_example(dict(uuid=uuid.encode("utf-8"), **audio))
+            writer.write(record)
+
+            labels[uuid] = "label " + uuid
+            index[uuid] = (0, offset, len(record) + 16) # with TFRecord framing
+            offset += len(record) + 16
+
+    return labels, index
+
+def write_indexed_split(path, name, samples):
+    """Writes split with uuids name + "0", "1", ... and returns it."""
+
+    labels, index = write_shard(path, name + "-0.tfrec", samples, "pcm16", prefix=name)
+    write_split(path, name, labels, files=[ name + "-0.tfrec" ], format="pcm16", index=index,
+        lengths={ uuid: len(pcm) for uuid, pcm in zip(labels, samples) }
+    )
+    return DataSplit(str(path), name)
+
+def make_samples(count, seed=0):
+    rng = np.random.RandomState(seed)
+    return [ rng.randint(-32768, 32768, size=100 + 10 * n).astype("<i2") for n in range(count) ]
+
+@pytest.mark.parametrize("format", [ "float32", "pcm16" ])
+def test_get_dataset(tmp_path, format):
+    samples = make_samples(5)
+
+    labels, _ = write_shard(tmp_path, "train-0.tfrec", samples, format)
+    write_split(tmp_path, "train", labels, files=[ "train-0.tfrec" ], format=format)
+    split = DataSplit(str(tmp_path), "train")
+
+    padded = list(split.get_dataset(2, seed=0).as_numpy_iterator())
+    ragged = list(split.get_dataset(2, seed=0, ragged=True).as_numpy_iterator())
+    assert [ len(uuids) for uuids, _, _ in padded ] == [ 2, 2, 1 ]
+
+    for (uuids, audio, lengths), (ragged_uuids, ragged_audio) in zip(padded, ragged):
+        assert uuids.tolist() == ragged_uuids.tolist()
+        for uuid, row, length, ragged_row in zip(uuids, audio, lengths, ragged_audio):
+            pcm = samples[int(uuid)]
+            assert length == len(pcm) == len(ragged_row)
+            assert np.array_equal(row[:length], pcm / 32768)
+            assert np.array_equal(ragged_row, pcm / 32768)
+            assert not row[length:].any()
+
+    dataset = split.get_dataset(2, seed=0, drop_remainder=True)
+    assert [ len(uuids) for uuids, _, _ in dataset.as_numpy_iterator() ] == [ 2, 2 ]
+
+def test_get_examples(tmp_path):
+    samples = { name: make_samples(3, seed) for seed, name in enumerate([ "a", "b" ]) }
+    splits = [ write_indexed_split(tmp_path, name, samples[name]) for name in samples ]
+    multi = MultiSplit(splits, "train")
+
+    uuids = [ "b2", "a0", "b0", "a2" ]
+    for uuid, (parsed_uuid, audio) in zip(uuids, multi.get_examples(uuids)):
+        assert parsed_uuid.numpy().decode("utf-8") == uuid
+        assert np.array_equal(audio.numpy(), samples[uuid[0]][int(uuid[1])] / 32768)
+
+    assert multi.get_examples(uuids, parse=False) == splits[1].get_examples([ "b2" ], parse=False) + \
+        splits[0].get_examples([ "a0" ], parse=False) + splits[1].get_examples([ "b0" ], parse=False) + \
+        splits[0].get_examples([ "a2" ], parse=False)
+
+    for split in [ splits[0], multi ]:
+        _, audio = split.get_example("a1")
+        assert np.array_equal(audio.numpy(), samples["a"][1] / 32768)
+
+    with pytest.raises(KeyError):
+        multi.get_examples([ "a0", "c0" ])
+    with pytest.raises(KeyError):
+        splits[0].get_examples([ "b0" ])
+
+def test_get_examples_without_index(tmp_path):
+    write_split(tmp_path, "train", { "a": "one" })
+    with pytest.raises(ValueError):
+        DataSplit(str(tmp_path), "train").get_examples([ "a" ])
+
+def subset_uuids(recordset):
+    from open_speech.util import parse_serial
+    return sorted(uuid.decode("utf-8") for uuid, _ in recordset.map(parse_serial).as_numpy_iterator())
+
+def test_subset(tmp_path):
+    splits = [ write_indexed_split(tmp_path, name, make_samples(4, seed)) for seed, name in enumerate([ "a", "b" ]) ]
+    multi = MultiSplit(splits, "train")
+
+    assert subset_uuids(splits[0].subset([ "a3", "a1", "b0", "unknown" ])) == [ "a1", "a3" ]
+    assert subset_uuids(multi.subset([ "b0", "a2" ])) == [ "a2", "b0" ]
+    assert subset_uuids(splits[1].subset([])) == []
+    assert list(multi.subset([ "b1" ]).as_numpy_iterator()) == multi.get_examples([ "b1" ], parse=False)
+
+    # lengths are 100, 110, 120, 130 samples
+    predicate = lambda uuid, label, length: length > 115 or label == "label b0"
+    assert subset_uuids(splits[1].subset(predicate=predicate)) == [ "b0", "b2", "b3" ]
+    assert subset_uuids(multi.subset(predicate=predicate)) == [ "a2", "a3", "b0", "b2", "b3" ]
+
+    for kwargs in [ {}, { "uuids": [ "a0" ], "predicate": predicate } ]:
+        with pytest.raises(ValueError):
+            splits[0].subset(**kwargs)
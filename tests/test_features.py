@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from open_speech import build
+from open_speech.util import parse_features
+
+sample_rate = 16000
+
+@pytest.fixture
+def pcm():
+    rng = np.random.RandomState(0)
+    return (rng.randn(2 * sample_rate) * 3000).astype("<i2").tobytes()
+
+def tf_features(pcm, params):
+    audio = tf.cast(tf.io.decode_raw(pcm, tf.int16, little_endian=True), tf.float32) / 32768.0
+    spectrum = tf.abs(tf.signal.stft(audio, params["frame_length"], params["frame_step"], params["fft_length"]))
+
+    weights = tf.signal.linear_to_mel_weight_matrix(params["num_mel_bins"], params["fft_length"] // 2 + 1,
+        sample_rate, params["lower_edge_hertz"], params["upper_edge_hertz"]
+    )
+    features = tf.math.log(tf.matmul(spectrum, weights) + 1e-6)
+
+    if params["type"] == "mfcc":
+        features = tf.signal.mfccs_from_log_mel_spectrograms(features)[:, :params["num_mfccs"]]
+    return features.numpy()
+
+@pytest.mark.parametrize("features", [
+    { "type": "log-mel" },
+    { "type": "mfcc" },
+    { "type": "log-mel", "frame_length": 512, "frame_step": 128, "num_mel_bins": 40 },
+    { "type": "mfcc", "frame_length": 320, "fft_length": 1024, "num_mfccs": 20 },
+])
+def test_matches_tf_signal(pcm, features):
+    params = build.feature_params(features, sample_rate)
+    expected = tf_features(pcm, params)
+
+    actual = build.compute_features(pcm, sample_rate, params)
+    assert actual.shape == expected.shape == (actual.shape[0], params["depth"])
+    np.testing.assert_allclose(actual, expected, atol=1e-4)
+
+def test_short_audio(pcm):
+    params = build.feature_params({}, sample_rate)
+    assert build.compute_features(pcm[:100], sample_rate, params).shape == (0, params["depth"])
+
+@pytest.mark.parametrize("dtype", build.feature_dtypes)
+def test_parse_features(pcm, dtype):
+    params = build.feature_params({ "dtype": dtype }, sample_rate)
+    features = build.compute_features(pcm, sample_rate, params)
+
+    record = build.encode_example(dict(uuid=b"uuid", **build.quantize_features(features, dtype)))
+    uuid, parsed = parse_features(tf.constant(record), params["depth"], dtype)
+
+    assert uuid.numpy() == b"uuid"
+    assert parsed.shape == features.shape
+
+    if dtype == "int8":
+        scale = (features.max() - features.min()) / 255
+        assert np.abs(parsed.numpy() - features).max() <= scale / 2 * 1.001
+    else: np.testing.assert_allclose(parsed.numpy(), features.astype("f2").astype("f4"))
+
+def test_feature_params():
+    params = build.feature_params({ "type": "mfcc", "frame_length": 400 }, sample_rate)
+    assert params["fft_length"] == 512
+    assert params["depth"] == params["num_mfccs"]
+
+    for features in [ { "type": "other" }, { "dtype": "int16" }, { "frames": 1 }, { "num_mfccs": 100, "type": "mfcc" } ]:
+        with pytest.raises(ValueError):
+            build.feature_params(features, sample_rate)
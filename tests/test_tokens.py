@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from open_speech.tokens import TokenTable, token_table, encode_labels, _encode_chars, _encode_tokens
+
+labels = { "1": "ab c", "2": "", "3": "über?", "4": "cab" }
+
+def decode(values, offsets, vocabulary):
+    return [ "".join(vocabulary[id] for id in values[start:end]) for start, end in zip(offsets[:-1], offsets[1:]) ]
+
+def test_encode_chars():
+    vocabulary = [ " ", "a", "b", "c", "r", "ü" ]
+    values, offsets = _encode_chars(list(labels.values()), vocabulary)
+
+    assert values.dtype == np.int32 and offsets.dtype == np.int64
+    assert decode(values, offsets, vocabulary) == [ "ab c", "", "übr", "cab" ] # unknown characters are dropped
+
+def test_encode_tokens():
+    vocabulary = [ "a", "ab", "b", "c", " ", "üb" ]
+    values, offsets = _encode_tokens(list(labels.values()), vocabulary)
+
+    assert values.dtype == np.int32 and offsets.dtype == np.int64
+    assert values[:3].tolist() == [ 1, 4, 3 ] # longest match first
+    assert decode(values, offsets, vocabulary) == [ "ab c", "", "üb", "cab" ]
+
+@pytest.mark.parametrize("vocabulary", [ None, list("abcü "), [ "ab", "c", " " ] ])
+def test_encode_chars_and_tokens_agree(vocabulary):
+    uuids, values, offsets, vocabulary = encode_labels(labels, vocabulary)
+    assert uuids == list(labels)
+
+    expected = _encode_tokens(list(labels.values()), vocabulary)
+    assert values.tolist() == expected[0].tolist()
+    assert offsets.tolist() == expected[1].tolist()
+
+def test_encode_labels_default_vocabulary():
+    uuids, values, offsets, vocabulary = encode_labels(labels)
+    assert vocabulary == sorted(set("".join(labels.values())))
+    assert decode(values, offsets, vocabulary) == list(labels.values())
+
+def test_encode_labels_requires_mapping():
+    with pytest.raises(TypeError):
+        encode_labels(list(labels.items()))
+
+@pytest.mark.parametrize("vocabulary", [ None, [ "ab", "c", " ", "a", "b" ] ])
+def test_token_table(vocabulary):
+    table = token_table(labels, vocabulary)
+    assert isinstance(table, TokenTable)
+
+    uuids, values, offsets, _ = encode_labels(labels, vocabulary)
+    for uuid, start, end in zip(uuids, offsets[:-1], offsets[1:]):
+        tokens = table.lookup(tf.constant(uuid))
+        assert tokens.dtype == tf.int32
+        assert tokens.numpy().tolist() == values[start:end].tolist()
+
+    assert table.lookup(tf.constant("unknown")).numpy().tolist() == []
+
+def test_token_table_batch():
+    table = token_table(labels)
+    tokens = table.lookup(tf.constant([ "4", "unknown", "1" ]))
+
+    assert isinstance(tokens, tf.RaggedTensor)
+    assert tokens.to_list() == [ table.lookup(tf.constant("4")).numpy().tolist(), [], table.lookup(tf.constant("1")).numpy().tolist() ]
+
+def test_token_table_in_dataset():
+    table = token_table(labels)
+    ds = tf.data.Dataset.from_tensor_slices([ "1", "3", "unknown" ]).batch(3)
+    tokens = next(iter(ds.map(table.lookup)))
+
+    assert [ "".join(table.vocabulary[id] for id in row) for row in tokens.to_list() ] == [ "ab c", "über?", "" ]
+
+def test_empty_token_table():
+    table = token_table({})
+    assert table.vocabulary == []
+    assert table.lookup(tf.constant("1")).numpy().tolist() == []
+    assert table.lookup(tf.constant([ "1", "" ])).to_list() == [ [], [] ]
@@ -0,0 +1,181 @@
+import numpy as np
+import pytest
+import tensorflow as tf
+
+from open_speech.build import encode_example
+from open_speech.util import _use_http, bucket_boundaries, clean, clean_many, clean_tensor, get_recordset, mix_recordsets
+from open_speech.util import MergedMapping, parse_batch, parse_serial, prefetch_metadata, read_file, shard_files
+
+def test_bucket_boundaries():
+    assert bucket_boundaries(range(100), 4) == [ 25, 50, 75 ]
+    assert bucket_boundaries([ 5 ] * 10, 4) == [ 5 ]
+
+def test_bucket_boundaries_empty():
+    assert bucket_boundaries([], 4) == []
+
+def test_prefetch_metadata_no_splits():
+    assert prefetch_metadata([]) == []
+
+def test_read_file(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"0123456789")
+
+    assert read_file(str(path)) == b"0123456789"
+    assert read_file(str(path), 2, 3) == b"234"
+    assert read_file(str(path), 5, 0) == b""
+
+def test_use_http(monkeypatch):
+    monkeypatch.delenv("OPEN_SPEECH_HTTP", raising=False)
+    assert _use_http("gs://bucket/file")
+    assert not _use_http("s3://bucket/file")
+
+    monkeypatch.setenv("OPEN_SPEECH_HTTP", "0")
+    assert not _use_http("gs://bucket/file")
+
+def test_merged_mapping():
+    maps = [ { "a": 1, "b": 2 }, {}, { "c": 3 } ]
+    merged = MergedMapping(lambda: maps)
+
+    assert len(merged) == 3
+    assert list(merged) == [ "a", "b", "c" ]
+    assert list(merged.values()) == [ 1, 2, 3 ]
+    assert list(merged.items()) == [ ("a", 1), ("b", 2), ("c", 3) ]
+    assert merged["c"] == 3 and merged.get("d") is None
+    assert "b" in merged and "d" not in merged
+    assert dict(merged) == { "a": 1, "b": 2, "c": 3 }
+
+    with pytest.raises(KeyError):
+        merged["d"]
+
+    # the view follows changes of the underlying mappings
+    maps[1]["d"] = 4
+    maps[0] = { "e": 5 }
+    assert len(merged) == 3
+    assert dict(merged) == { "e": 5, "d": 4, "c": 3 }
+    assert "a" not in merged
+
+def test_clean_many():
+    labels = { "a": "Hello, World!", "b": "  Don't  " }
+    assert clean_many(labels) == { "a": "hello world", "b": "don't" }
+    assert clean_many(list(labels.values()), workers=2, chunk_size=1) == [ "hello world", "don't" ]
+
+def write_records(path):
+    """Writes 4 files with 3 records each and returns their names."""
+
+    files = []
+    for n in range(4):
+        files.append(str(path / "{}.tfrec".format(n)))
+        with tf.io.TFRecordWriter(files[-1]) as writer:
+            for m in range(3): writer.write("{}-{}".format(n, m).encode("utf-8"))
+
+    return files
+
+def test_clean_tensor():
+    import string
+
+    labels = [ "Hello, World!", "  Don't  ", "\tTABS\tand\nnew lines\n", string.punctuation, "a-b (c) [d]", "", "42 IS 4*10+2" ]
+    assert [ label.decode("utf-8") for label in clean_tensor(tf.constant(labels)).numpy() ] == [ clean(label) for label in labels ]
+
+    labels = tf.constant([ [ "A.", "B?" ], [ " C ", "D'" ] ])
+    assert clean_tensor(labels).numpy().tolist() == [ [ b"a", b"b" ], [ b"c", b"d'" ] ]
+
+    # unicode characters are left as is
+    assert clean_tensor(tf.constant("Über!")).numpy().decode("utf-8") == "Über"
+
+def test_get_recordset_with_seed(tmp_path):
+    files = write_records(tmp_path)
+
+    records = [ list(get_recordset(files, 2, seed=1).as_numpy_iterator()) for _ in range(2) ]
+    assert records[0] == records[1]
+    assert sorted(records[0]) == sorted("{}-{}".format(n, m).encode("utf-8") for n in range(4) for m in range(3))
+
+@pytest.mark.parametrize("cached", [ False, True ])
+def test_get_recordset_checkpoint(tmp_path, cached):
+    from open_speech.cache import ShardCache
+
+    (tmp_path / "bucket").mkdir()
+    files = write_records(tmp_path / "bucket")
+
+    def make_recordset():
+        cache = ShardCache(str(tmp_path / "cache")) if cached else None
+        return get_recordset(files, 2, cache=cache, seed=1, epoch=3)
+
+    expected = list(make_recordset().as_numpy_iterator())
+
+    iterator = iter(make_recordset())
+    records = [ next(iterator).numpy() for _ in range(5) ]
+    path = tf.train.Checkpoint(iterator=iterator).save(str(tmp_path / "checkpoint" / "ckpt"))
+
+    # restart: new recordset and iterator restored from the checkpoint
+    iterator = iter(make_recordset())
+    tf.train.Checkpoint(iterator=iterator).restore(path).assert_consumed()
+    records += [ record.numpy() for record in iterator ]
+
+    assert records == expected
+
+def test_mix_recordsets():
+    recordsets = [ tf.data.Dataset.from_tensor_slices([ name ] * 3) for name in [ "a", "b" ] ]
+
+    records = [ list(mix_recordsets(recordsets, [ 3, 1 ], seed=1).take(4000).as_numpy_iterator()) for _ in range(2) ]
+    assert records[0] == records[1] # same seed, same order
+    assert abs(records[0].count(b"a") / 4000 - .75) < .03 # smaller recordsets are repeated
+
+    other = list(mix_recordsets(recordsets, [ 3, 1 ], seed=2).take(4000).as_numpy_iterator())
+    assert other != records[0]
+
+    with pytest.raises(ValueError):
+        mix_recordsets(recordsets, [ 1 ])
+
+def test_shard_files():
+    files = [ "a", "b", "c", "d" ]
+    sizes = { "a": 4, "b": 3, "c": 2, "d": 1 }
+
+    shards = [ shard_files(files, sizes, 2, index) for index in range(2) ]
+    assert shards == [ [ "a", "d" ], [ "b", "c" ] ]
+
+    for num_shards, shard_index in [ (2, None), (None, 0), (2, 2), (5, 0) ]:
+        with pytest.raises(ValueError):
+            shard_files(files, sizes, num_shards, shard_index)
+
+def make_examples(formats):
+    """Returns uuids, 16-bit samples and serialized examples in the given formats."""
+
+    rng = np.random.RandomState(0)
+    uuids, samples, examples = [], [], []
+    for n, format in enumerate(formats):
+        uuids.append("uuid-{}".format(n).encode("utf-8"))
+        samples.append(rng.randint(-32768, 32768, size=10 + 7 * n).astype("<i2"))
+
+        audio = { "pcm": samples[-1].tobytes() } if format == "pcm16" else \
+            { "audio": samples[-1].astype("<f4") / 32768 }
+        examples.append(encode_example(dict(uuid=uuids[-1], **audio)))
+
+    return uuids, samples, examples
+
+@pytest.mark.parametrize("format", [ "float32", "pcm16", None ])
+def test_parse_serial(format):
+    uuids, samples, examples = make_examples([ format or "pcm16", format or "float32" ])
+
+    for uuid, pcm, example in zip(uuids, samples, examples):
+        parsed_uuid, audio = parse_serial(tf.constant(example), format)
+        assert parsed_uuid.numpy() == uuid
+        assert audio.dtype == tf.float32
+        assert np.array_equal(audio.numpy(), pcm / 32768)
+
+@pytest.mark.parametrize("format", [ "float32", "pcm16", None ])
+def test_parse_batch(format):
+    uuids, samples, examples = make_examples([ format or "float32", format or "pcm16", format or "float32" ])
+
+    parsed_uuids, audio, lengths = parse_batch(tf.constant(examples), format)
+    assert parsed_uuids.numpy().tolist() == uuids
+    assert lengths.numpy().tolist() == [ len(pcm) for pcm in samples ]
+    assert audio.shape == (3, max(lengths))
+
+    for row, pcm in zip(audio.numpy(), samples):
+        assert np.array_equal(row[:len(pcm)], pcm / 32768)
+        assert not row[len(pcm):].any() # zero-padded
+
+    parsed_uuids, audio = parse_batch(tf.constant(examples), format, ragged=True)
+    assert isinstance(audio, tf.RaggedTensor)
+    for row, pcm in zip(audio.to_list(), samples):
+        assert np.array_equal(row, pcm / 32768)
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+
+# Compare two ways of turning compressed audio files (MP3 or FLAC) into 16-bit
+# 16kHz PCM data:
+#
+# - "bash + ffmpeg": the former `03_convert.bash` pipeline, ie one `ffmpeg`
+#   process per file run through `xargs -P$(nproc)` writing WAV files, followed
+#   by reading the WAV files back in a pool of worker processes, as
+#   `open_speech.build` does when writing shards from WAV files;
+# - "in-process": decoding and resampling in a pool of worker processes, as
+#   `open_speech.build` does when writing shards from MP3 or FLAC files.
+#
+# Usage: decode_audio.py <directory with audio files> [number of files]
+#
+# Set $FFMPEG to use an `ffmpeg` binary other than the one in $PATH.
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from open_speech.build import read_audio
+from pathlib import Path
+
+sample_rate = 16000
+workers = os.cpu_count()
+ffmpeg = os.environ.get("FFMPEG", "ffmpeg")
+
+convert = "{} -v 16 -i \"$1\" -ar {} -ac 1 -c:a pcm_s16le \"$2/$(basename \"$1\").wav\" -y".format(ffmpeg, sample_rate)
+
+def decode(path):
+    return len(read_audio(path, sample_rate))
+
+def decode_all(paths):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(decode, paths, chunksize=16))
+
+def run_bash(paths):
+    with tempfile.TemporaryDirectory() as temp:
+        subprocess.run([ "bash", "-c",
+            "xargs -d '\\n' -P{} -I{{}} -n1 sh -c '{}' _ {{}} '{}'".format(workers, convert, temp)
+        ], input="\n".join(paths).encode("utf-8"), check=True)
+
+        return decode_all(sorted(str(path) for path in Path(temp).iterdir()))
+
+def run_decode(paths):
+    return decode_all(paths)
+
+if __name__ == "__main__":
+    audio_path = Path(sys.argv[1]).expanduser()
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    paths = sorted([ str(path) for path in audio_path.rglob("*")
+        if path.suffix.lower() in [ ".mp3", ".flac" ]
+    ])[:count]
+    print("Files:", len(paths), "workers:", workers)
+
+    for name, run in [ ("bash + ffmpeg", run_bash), ("in-process", run_decode) ]:
+        start = time.perf_counter()
+        size = run(paths)
+        elapsed = time.perf_counter() - start
+
+        print("{:>20}: {:7.3f}s, {:7.1f} files/s, {:.2f} hours of audio".format(
+            name, elapsed, len(paths) / elapsed, size / 2 / sample_rate / 3600
+        ))
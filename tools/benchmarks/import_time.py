@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+
+# Measure how long it takes to `import open_speech` and to use its metadata-only
+# API (`clean()` and split labels), and compare it with importing TensorFlow.
+# Each measurement runs in a fresh interpreter. Metadata-only snippets fail if
+# they import TensorFlow.
+#
+# Usage: import_time.py [dataset path (defaults to the published VoxForge dataset)]
+
+import statistics
+import subprocess
+import sys
+
+runs = 5
+dataset_path = sys.argv[1] if len(sys.argv) > 1 else "gs://open-speech-v5/voxforge/en"
+
+no_tensorflow = "; assert 'tensorflow' not in sys.modules"
+snippets = {
+    "import open_speech": "import open_speech" + no_tensorflow,
+    "open_speech.clean()": "import open_speech; open_speech.clean('Hello, World!')" + no_tensorflow,
+    "split labels": "from open_speech.datasplit import DataSplit; "
+        "len(DataSplit({!r}, 'valid').labels)".format(dataset_path) + no_tensorflow,
+    "import tensorflow": "import tensorflow",
+}
+
+timer = """
+import sys, time
+start = time.perf_counter()
+{}
+print(time.perf_counter() - start, "tensorflow" in sys.modules)
+"""
+
+for name, snippet in snippets.items():
+    times = []
+    for _ in range(runs):
+        result = subprocess.run([ sys.executable, "-c", timer.format(snippet) ],
+            capture_output=True, text=True
+        )
+        if result.returncode: break
+
+        output = result.stdout.split()
+        times.append(float(output[0]))
+
+    if not times:
+        print("{:>20}: failed".format(name))
+        continue
+
+    print("{:>20}: {:7.3f}s (median of {}), tensorflow imported: {}".format(
+        name, statistics.median(times), runs, output[1]
+    ))
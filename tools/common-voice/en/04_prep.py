@@ -1,13 +1,18 @@
 #!/usr/bin/python3
 
 # Collect sentences contained in the `{dev,test,train}.tsv` files, verify they
-# have matching WAV files in the `audio_path` directory and save them in JSON
-# format.
+# have matching MP3 files in the `clips_path` directory and save them in JSON
+# lines format. MP3 files are decoded later, when the TFRecord files are
+# written (see `open_speech.build`).
 
 import csv
-import pandas as pd
+import json
+import os
 
+from concurrent.futures import ThreadPoolExecutor
+from open_speech.build import try_read_audio_size
 from pathlib import Path
+from tqdm.auto import tqdm
 
 cv_path = "~/tensorflow_datasets/manual/common-voice/en"
 cv_path = Path(cv_path).expanduser()
@@ -15,46 +20,61 @@ cv_path = Path(cv_path).expanduser()
 extracted_path = cv_path / "extracted" / "cv-corpus-5.1-2020-06-22" / "en"
 tsv_names = [ "dev.tsv", "test.tsv", "train.tsv" ]
 
-audio_path = cv_path / "audio"
+clips_path = extracted_path / "clips"
 
+sample_rate = 16000
 max_size = 680000 # 21.25s @ 16kHz, 16-bit
 
-def read_data(tsv_path):
-    rows = []
-    errors = []
-    with open(tsv_path) as file:
-        for row in csv.DictReader(file, delimiter="\t"):
+# MP3 headers are read in parallel, since on network filesystems each read is a
+# round trip
+max_workers = 32
+
+# returns (row, None) for a valid example or (None, error) otherwise
+def read_row(row, names):
+    name = row["path"]
+    label = row["sentence"]
+
+    path = clips_path / name
+    if name not in names:
+        return None, "Missing file: " + str(path)
 
-            name = Path(row["path"]).with_suffix(".wav")
-            label = row["sentence"]
+    size, error = try_read_audio_size(str(path), sample_rate)
+    if error is not None: return None, error
 
-            path = audio_path / name
-            if not path.exists():
-                errors.append("Missing file: " + str(path))
+    if size > max_size:
+        return None, "Long file: " + str(path)
 
-            else:
-                size = path.stat().st_size
-                if size > max_size:
-                    errors.append("Long file: " + str(path))
+    return { "path" : str(path.relative_to(extracted_path)), "audio_size" : size, "label": label }, None
 
-                else: rows.append({
-                    "path" : str(name), "size" : size, "label": label,
-                })
+# rows are written out as they come, one JSON object per line
+def write_rows(file, results):
+    count, errors = 0, []
+    for row, error in results:
+        if error is not None: errors.append(error)
+        else:
+            file.write(json.dumps(row) + "\n")
+            count += 1
 
-    return rows, errors
+    return count, errors
+
+# a single directory listing instead of checking every file
+print("Listing:", clips_path)
+names = set([ entry.name for entry in os.scandir(clips_path) ])
 
 for tsv_name in tsv_names:
     tsv_path = extracted_path / tsv_name
-    json_path = (audio_path / tsv_name).with_suffix(".json")
+    jsonl_path = tsv_path.with_suffix(".jsonl")
 
     print("\nProccessing:", tsv_path)
-    rows, errors = read_data(tsv_path)
+    with open(tsv_path) as file:
+        tsv_rows = list(csv.DictReader(file, delimiter="\t"))
 
-    data = pd.DataFrame(rows)
-    print("Total examples:", len(data))
+    print("Saving to:", jsonl_path)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, open(jsonl_path, "w") as file:
+        results = pool.map(lambda row: read_row(row, names), tsv_rows)
+        count, errors = write_rows(file, tqdm(results, total=len(tsv_rows)))
 
-    print("Saving to:", json_path)
-    data.to_json(json_path, orient="table")
+    print("Total examples:", count)
 
     if len(errors):
         print("\nErrors:")
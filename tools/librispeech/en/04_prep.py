@@ -1,12 +1,15 @@
 #!/usr/bin/python3
 
 # Collect sentences found in extracted dev, test and train archives, verify they
-# have matching WAV files in the `audio_path` directory and save them in JSON
-# format.
+# have matching FLAC files in the `audio_path` directory and save them in JSON
+# lines format. FLAC files are decoded later, when the TFRecord files are
+# written (see `open_speech.build`).
 
-import numpy as np
-import pandas as pd
+import json
+import os
 
+from concurrent.futures import ThreadPoolExecutor
+from open_speech.build import try_read_audio_size
 from pathlib import Path
 from tqdm.auto import tqdm
 
@@ -15,61 +18,95 @@ libri_path = Path(libri_path).expanduser()
 
 extracted_path = libri_path / "extracted" / "LibriSpeech"
 parts = {
-    "train.json": [ "train-clean-100", "train-clean-360" ],
-    "valid.json": [  "dev-clean" ],
-    "test.json" : [ "test-clean" ],
+    "train.jsonl": [ "train-clean-100", "train-clean-360" ],
+    "valid.jsonl": [  "dev-clean" ],
+    "test.jsonl" : [ "test-clean" ],
 }
 
+sample_rate = 16000
 max_size = 680000 # 21.25s @ 16kHz, 16-bit
 
+# directories are scanned in parallel, since on network filesystems each
+# listing or read is a round trip
+max_workers = 32
+
+# transcript files of all chapters of a speaker, in the form
+# `<speaker>/<chapter>/<speaker>-<chapter>.trans.txt`
+def list_trans(speaker_path):
+    return [ Path(entry.path) / (speaker_path.name + "-" + entry.name + ".trans.txt")
+        for entry in os.scandir(speaker_path) if entry.is_dir()
+    ]
+
+# returns list of (row, None) for valid examples and (None, error) otherwise
 def read_data(trans_path):
-    audio_path = trans_path.parent.relative_to(extracted_path)
+    chapter_path = trans_path.parent
+    audio_path = chapter_path.relative_to(extracted_path)
 
-    rows = []
-    errors = []
+    # a single directory listing instead of checking every file
+    names = set([ entry.name for entry in os.scandir(chapter_path) ])
+    if trans_path.name not in names:
+        return [(None, "Missing transcript: " + str(trans_path))]
+
+    results = []
     with open(trans_path) as file:
         for row in file.read().splitlines():
 
             try: name, label = row.split(" ", 1)
             except: continue
 
-            name = audio_path / (name + ".wav")
-            path = extracted_path / name
-            if not path.exists():
-                errors.append("Missing file: " + str(path))
+            name = name + ".flac"
+            path = chapter_path / name
+            if name not in names:
+                results.append((None, "Missing file: " + str(path)))
 
             else:
-                size = path.stat().st_size
-                if size > max_size:
-                    errors.append("Long file: " + str(path))
+                size, error = try_read_audio_size(str(path), sample_rate)
+                if error is not None: results.append((None, error))
+
+                elif size > max_size:
+                    results.append((None, "Long file: " + str(path)))
 
-                else: rows.append({
-                    "path" : str(name), "size" : size, "label": label,
-                })
+                else: results.append(({
+                    "path" : str(audio_path / name), "audio_size" : size, "label": label,
+                }, None))
 
-    return rows, errors
+    return results
 
-for part_json, part_names in parts.items():
-    rows_all = []
+# rows are written out as they come, one JSON object per line
+def write_rows(file, results):
+    count, errors = 0, []
+    for row, error in results:
+        if error is not None: errors.append(error)
+        else:
+            file.write(json.dumps(row) + "\n")
+            count += 1
+
+    return count, errors
+
+for part_jsonl, part_names in parts.items():
+    jsonl_path = extracted_path / part_jsonl
+    count_all = 0
     errors_all = []
 
     print()
-    for part_name in part_names:
-        print("Processing:", part_name)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, open(jsonl_path, "w") as file:
+        for part_name in part_names:
+            print("Processing:", part_name)
+
+            speaker_paths = [ Path(entry.path)
+                for entry in os.scandir(extracted_path / part_name) if entry.is_dir()
+            ]
+            trans_paths = [ path for paths in pool.map(list_trans, speaker_paths) for path in paths ]
 
-        trans_paths = list((extracted_path / part_name).glob("**/*.trans.txt"))
-        for trans_path in tqdm(trans_paths):
-            rows, errors = read_data(trans_path)
-            rows_all += rows
-            errors_all += errors
+            for results in tqdm(pool.map(read_data, trans_paths), total=len(trans_paths)):
+                count, errors = write_rows(file, results)
+                count_all += count
+                errors_all += errors
 
-    data_all = pd.DataFrame(rows_all)
-    print("Total examples:", len(data_all))
+    print("Total examples:", count_all)
 
     if len(errors_all):
         print("\nErrors:")
         for error in errors_all: print(error)
 
-    json_path = extracted_path / part_json
-    print("Saving:", json_path)
-    data_all.to_json(json_path, orient="table")
+    print("Saved:", jsonl_path)
@@ -1,24 +1,27 @@
 #!/usr/bin/python3
 
 # Collect sentences found in extracted archives, split them into training,
-# validation and test sets, verify they have matching WAV files in the
-# `audio_path` directory and save in JSON format.
+# validation and test sets by their uuid (the same way `open_speech.build` does
+# when building from archives), verify they have matching WAV or FLAC files in
+# the `audio_path` directory and save in JSON lines format. FLAC files are decoded
+# later, when the TFRecord files are written (see `open_speech.build`).
 
-import numpy as np
-import pandas as pd
+import json
+import os
 
+from concurrent.futures import ThreadPoolExecutor
+from open_speech.build import corpora, try_read_audio_size, weighted_split
 from pathlib import Path
 from tqdm.auto import tqdm
+from uuid import NAMESPACE_URL, uuid5
 
 vox_path = "~/tensorflow_datasets/manual/voxforge/en"
 vox_path = Path(vox_path).expanduser()
 
 extracted_path = vox_path / "extracted"
 
-data_names = [ "train.json", "valid.json", "test.json" ]
-data_probs = [ .8, .1, .1 ]
+split_weights = corpora["voxforge"]["weights"]
 
-arch_paths = extracted_path.glob("*")
 prompt_names = [
     "prompts-original",
     "prompt.txt", "prompts.txt", "cc.prompts", "therainbowpassage.prompt",
@@ -26,67 +29,94 @@ prompt_names = [
     "PROMPTS",
 ]
 
+# archives contain either "wav" or "flac" directory
+audio_types = [ "wav", "flac" ]
+
+sample_rate = 16000
 max_size = 680000 # 21.25s @ 16kHz, 16-bit
 
-def read_data(arch_path):
-    audio_path = arch_path / "wav"
-    if not audio_path.exists():
-        return [], ["Missing audio dir: " + str(arch_path)]
+# archives are scanned in parallel, since on network filesystems each listing
+# or read is a round trip
+max_workers = 32
+
+# names of the files in a directory, or None if it doesn't exist
+def list_names(path):
+    try: return set([ entry.name for entry in os.scandir(path) ])
+    except FileNotFoundError: return None
 
+# returns list of (row, None) for valid examples and (None, error) otherwise
+def read_data(arch_path):
+    # a single directory listing instead of checking every file
+    for audio_type in audio_types:
+        audio_path = arch_path / audio_type
+        names = list_names(audio_path)
+        if names is not None: break
+    else: return [(None, "Missing audio dir: " + str(arch_path))]
+
+    etc_names = list_names(arch_path / "etc") or set()
     for name in prompt_names:
-        prompt_path = arch_path / "etc" / name
-        if prompt_path.exists(): break
+        if name in etc_names: break
+    else: return [(None, "Missing prompts: " + str(arch_path))]
 
-    if not prompt_path.exists():
-        return [], ["Missing prompts: " + str(arch_path)]
+    prompt_path = arch_path / "etc" / name
 
-    rows = []
-    errors = []
+    results = []
     with open(prompt_path) as file:
         for row in file.read().splitlines():
 
             try: name, label = row.split(" ", 1)
             except: continue
 
-            name = Path(name).name + ".wav"
-            name = audio_path.relative_to(extracted_path) / name
-            path = extracted_path / name
-            if not path.exists():
-                errors.append("Missing file: " + str(path))
+            name = Path(name).name + "." + audio_type
+            path = audio_path / name
+            if name not in names:
+                results.append((None, "Missing file: " + str(path)))
 
             else:
-                size = path.stat().st_size
-                if size > max_size:
-                    errors.append("Long file: " + str(path))
+                size, error = try_read_audio_size(str(path), sample_rate)
+                if error is not None: results.append((None, error))
+
+                elif size > max_size:
+                    results.append((None, "Long file: " + str(path)))
+
+                else: results.append(({
+                    "path" : str(path.relative_to(extracted_path)), "audio_size" : size, "label": label,
+                }, None))
 
-                else: rows.append({
-                    "path" : str(name), "size" : size, "label": label,
-                })
+    return results
 
-    return rows, errors
+arch_paths = [ Path(entry.path) for entry in os.scandir(extracted_path) if entry.is_dir() ]
 
-rows_all = []
+# rows are assigned to data splits by their uuid (see `Builder.make_uuid`), so
+# that each run produces the same splits, and written out as they come, one JSON
+# object per line
+def get_split(row):
+    uuid = str(uuid5(NAMESPACE_URL, "voxforge/" + row["path"]))
+    return weighted_split(uuid, split_weights)
+
+files = { split: open(extracted_path / (split + ".jsonl"), "w") for split in split_weights }
+counts = { split: 0 for split in split_weights }
 errors_all = []
+
 print("Processing:")
-for arch_path in tqdm(list(arch_paths)):
-    if arch_path.is_dir():
-        rows, errors = read_data(arch_path)
-        rows_all += rows
-        errors_all += errors
+with ThreadPoolExecutor(max_workers=max_workers) as pool:
+    for results in tqdm(pool.map(read_data, arch_paths), total=len(arch_paths)):
+        for row, error in results:
+            if error is not None:
+                errors_all.append(error)
+                continue
+
+            split = get_split(row)
+            files[split].write(json.dumps(row) + "\n")
+            counts[split] += 1
 
-data_all = pd.DataFrame(rows_all)
-print("Total examples:", len(data_all))
+for file in files.values(): file.close()
+print("Total examples:", sum(counts.values()))
 
 if len(errors_all):
     print("\nErrors:")
     for error in errors_all: print(error)
 
-indices = np.random.choice(len(data_probs), size=len(data_all), p=data_probs)
-
 print()
-for n in range(len(data_names)):
-    json_path = extracted_path / data_names[n]
-    data = data_all[indices == n]
-
-    print("Saving:", json_path)
-    data.to_json(json_path, orient="table")
+for split, count in counts.items():
+    print("Saved:", extracted_path / (split + ".jsonl"), "({} examples)".format(count))